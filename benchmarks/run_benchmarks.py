@@ -0,0 +1,219 @@
+"""Offline benchmarks of the ISIN Sensor integration against the local API stub.
+
+Run from the repository root:
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 10 100 --latency 0.05 --error-rate 0.01
+
+Results are written to benchmarks/results/latest.json and compared against
+benchmarks/results/baseline.json (create it with --save-baseline).
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from homeassistant import config_entries, loader
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_test_home_assistant
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from stub_server import StubApi, make_isin  # noqa: E402
+
+INTEGRATION = "custom_components.mini-stock-pocket"
+const = importlib.import_module(f"{INTEGRATION}.const")
+api = importlib.import_module(f"{INTEGRATION}.api")
+DOMAIN = const.DOMAIN
+
+# Kennzahlen, bei denen ein höherer Wert eine Regression ist
+REGRESSION_METRICS = ("cycle_wall_time", "cycle_requests", "cycle_state_writes", "cycle_peak_memory", "flow_requests")
+
+
+def _holdings(start, count):
+    """Return sensor configurations for count holdings."""
+    return [
+        {"isin": make_isin(start + i), "name": f"Holding {start + i}", "quantity": float(i % 50 + 1)}
+        for i in range(count)
+    ]
+
+
+async def _async_run_cycle(hass, hubs, stub, state_writes):
+    """Run one refresh cycle of all hubs with every ISIN due and measure it."""
+    # Direkt aufeinanderfolgende Zyklen fragen nach Intervall nichts ab: alle ISINs fällig machen
+    hubs[0].coordinator.registry.fetched.clear()
+    requests_before = stub.request_count
+    writes_before = state_writes[0]
+    tracemalloc.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(hub.coordinator.async_refresh() for hub in hubs))
+    await hass.async_block_till_done()
+    wall_time = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "cycle_wall_time": round(wall_time, 4),
+        "cycle_requests": stub.request_count - requests_before,
+        "cycle_state_writes": state_writes[0] - writes_before,
+        "cycle_peak_memory": peak,
+    }
+
+
+async def _async_run_flows(hass, stub, holdings):
+    """Create a hub through the config flow and edit one quantity through the options flow."""
+    requests_before = stub.request_count
+    start = time.perf_counter()
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {"hub_name": "Flow Hub"})
+    for i, holding in enumerate(holdings):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {**holding, "add_more_sensors": i < len(holdings) - 1}
+        )
+    await hass.async_block_till_done()
+    config_flow_time = time.perf_counter() - start
+    entry = result["result"]
+
+    start = time.perf_counter()
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(result["flow_id"], {"action": "edit_quantity"})
+    result = await hass.config_entries.options.async_configure(result["flow_id"], {"isin": holdings[0]["isin"]})
+    result = await hass.config_entries.options.async_configure(result["flow_id"], {"quantity": 123.0})
+    await hass.async_block_till_done()
+    options_flow_time = time.perf_counter() - start
+
+    return {
+        "config_flow_time": round(config_flow_time, 4),
+        "options_flow_time": round(options_flow_time, 4),
+        "flow_requests": stub.request_count - requests_before,
+    }
+
+
+async def async_run_scenario(size, hub_count, args):
+    """Benchmark one portfolio size spread over several hubs."""
+    stub = StubApi(latency=args.latency, error_rate=args.error_rate, type_mix=args.type_mix)
+    api.API_BASE_URL = await stub.async_start()
+    try:
+        async with async_test_home_assistant() as hass:
+            hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)  # Custom Integrations erlauben
+            state_writes = [0]
+
+            def _count_state_change(event):
+                state_writes[0] += 1
+
+            hass.bus.async_listen(EVENT_STATE_CHANGED, _count_state_change)
+            await async_setup_component(
+                hass,
+                DOMAIN,
+                {
+                    DOMAIN: {
+                        const.CONF_MAX_CONCURRENT_REQUESTS: args.max_concurrent_requests,
+                        const.CONF_REQUESTS_PER_SECOND: args.requests_per_second,
+                    }
+                },
+            )
+
+            per_hub = max(1, size // hub_count)
+            for i in range(hub_count):
+                name = f"Hub {i}"
+                MockConfigEntry(
+                    domain=DOMAIN,
+                    title=name,
+                    # Mit --shared-holdings halten alle Hubs dieselben Positionen
+                    data={"hub_name": name, "sensors": _holdings(0 if args.shared_holdings else i * per_hub, per_hub)},
+                ).add_to_hass(hass)
+
+            start = time.perf_counter()
+            await hass.config_entries.async_setup(hass.config_entries.async_entries(DOMAIN)[0].entry_id)
+            for entry in hass.config_entries.async_entries(DOMAIN)[1:]:
+                await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+            setup_time = time.perf_counter() - start
+            # Die erste Abfrage läuft im Hintergrund und darf nicht in die Messung der Zyklen fallen
+            await hass.async_block_till_done(wait_background_tasks=True)
+
+            hubs = list(hass.data[DOMAIN].values())
+            result = {"holdings": per_hub * hub_count, "hubs": hub_count, "setup_time": round(setup_time, 4)}
+
+            stub.tick()
+            result.update(await _async_run_cycle(hass, hubs, stub, state_writes))
+            unchanged = await _async_run_cycle(hass, hubs, stub, state_writes)
+            result.update({f"unchanged_{key}": value for key, value in unchanged.items()})
+
+            flow_holdings = _holdings(size * 10, min(per_hub, args.flow_holdings))
+            result.update(await _async_run_flows(hass, stub, flow_holdings))
+            result["responses"] = {f"{endpoint} {status}": count for (endpoint, status), count in stub.requests.items()}
+
+            for entry in hass.config_entries.async_entries(DOMAIN):
+                await hass.config_entries.async_unload(entry.entry_id)
+            return result
+    finally:
+        await stub.async_stop()
+
+
+def _compare(results, baseline, tolerance):
+    """Return a list of regressions against the baseline."""
+    regressions = []
+    for name, metrics in results.items():
+        for metric in REGRESSION_METRICS:
+            old = baseline.get(name, {}).get(metric)
+            new = metrics.get(metric)
+            if old is not None and new is not None and new > old * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {old} -> {new}")
+    return regressions
+
+
+async def async_main(args):
+    """Run all scenarios and store the results."""
+    results = {}
+    for size in args.sizes:
+        name = f"{size}_holdings_{args.hubs}_hubs" + ("_shared" if args.shared_holdings else "")
+        results[name] = await async_run_scenario(size, args.hubs, args)
+        print(name, json.dumps(results[name], indent=2))
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    (RESULTS_DIR / "latest.json").write_text(json.dumps(results, indent=2) + "\n")
+    baseline_file = RESULTS_DIR / "baseline.json"
+    if args.save_baseline:
+        baseline_file.write_text(json.dumps(results, indent=2) + "\n")
+        return 0
+    if baseline_file.exists():
+        regressions = _compare(results, json.loads(baseline_file.read_text()), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        return 1 if regressions else 0
+    return 0
+
+
+def main():
+    """Parse the arguments and run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Holdings per scenario")
+    parser.add_argument("--hubs", type=int, default=4, help="Number of hubs the holdings are spread over")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub latency per request in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument(
+        "--type-mix",
+        type=json.loads,
+        default=None,
+        help='Instrument type weights as JSON, e.g. \'{"Share": 1, "Fund": 1}\'',
+    )
+    parser.add_argument("--shared-holdings", action="store_true", help="All hubs hold the same instruments")
+    parser.add_argument("--max-concurrent-requests", type=int, default=16, help="Scheduler in-flight limit")
+    parser.add_argument("--requests-per-second", type=float, default=10000, help="Scheduler request budget")
+    parser.add_argument("--flow-holdings", type=int, default=20, help="Holdings added through the config flow")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression against the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as new baseline")
+    sys.exit(asyncio.run(async_main(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
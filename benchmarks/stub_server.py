@@ -0,0 +1,161 @@
+"""Local stub of the ING component API for offline benchmarks."""
+import asyncio
+import random
+import zlib
+from collections import Counter
+
+from aiohttp import web
+
+INSTRUMENT_TYPES = ("Share", "Fund", "Bond", "ExchangeRate")
+
+_TYPE_DISPLAY_NAMES = {
+    "Share": "Aktie",
+    "Fund": "Fonds",
+    "Bond": "Anleihe",
+    "ExchangeRate": "Krypto",
+}
+
+
+def isin_check_digit(base):
+    """Return the check digit for the first 11 characters of an ISIN."""
+    digits = "".join(str(int(char, 36)) for char in base)
+    total = 0
+    for i, char in enumerate(reversed(digits)):
+        n = int(char)
+        if i % 2 == 0:
+            n *= 2
+            if n > 9:
+                n -= 9
+        total += n
+    return str((10 - total % 10) % 10)
+
+
+def make_isin(index, country="DE"):
+    """Return a valid ISIN for a running number."""
+    base = f"{country}{index:09d}"
+    return base + isin_check_digit(base)
+
+
+class StubApi:
+    """Serve instrumentheader and priceinformation responses with configurable behavior."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, type_mix=None, etag=True, seed=0):
+        """Initialize the stub.
+
+        latency is given in seconds, error_rate as a fraction of requests answered
+        with HTTP 503 and type_mix maps instrument types to relative weights.
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.type_mix = type_mix or {"Share": 5, "Fund": 3, "Bond": 1, "ExchangeRate": 1}
+        self.etag = etag
+        self.requests = Counter()  # (Endpunkt, Status) -> Anzahl
+        self.last_headers = {}  # Endpunkt -> Header der letzten Anfrage
+        self._random = random.Random(seed)
+        self._version = 0  # Erhöhen, um neue Kurse zu simulieren
+        self._types = tuple(self.type_mix)
+        self._weights = tuple(self.type_mix.values())
+        self._runner = None
+        self.base_url = None
+
+    @property
+    def request_count(self):
+        """Return the total number of requests served."""
+        return sum(self.requests.values())
+
+    def tick(self):
+        """Change all prices, so the next responses are no longer 304."""
+        self._version += 1
+
+    def instrument_type(self, isin):
+        """Return the stable instrument type of an ISIN according to the type mix."""
+        rnd = random.Random(zlib.crc32(isin.encode()))
+        return rnd.choices(self._types, self._weights)[0]
+
+    def _price(self, isin):
+        """Return a deterministic price for an ISIN and the current version."""
+        return round(10 + zlib.crc32(f"{isin}:{self._version}".encode()) % 100000 / 100, 2)
+
+    async def _respond(self, endpoint, request, body):
+        """Apply latency and error rate, then answer with body."""
+        self.last_headers[endpoint] = dict(request.headers)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._random.random() < self.error_rate:
+            self.requests[(endpoint, 503)] += 1
+            return web.Response(status=503)
+
+        etag = f'"{self._version}"'
+        if self.etag and request.headers.get("If-None-Match") == etag:
+            self.requests[(endpoint, 304)] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+
+        self.requests[(endpoint, 200)] += 1
+        headers = {"ETag": etag} if self.etag else {}
+        return web.json_response(body(), headers=headers)
+
+    async def instrumentheader(self, request):
+        """Handle an instrumentheader request."""
+        isin = request.match_info["isin"]
+        instrument_type = self.instrument_type(isin)
+
+        def body():
+            price = self._price(isin)
+            return {
+                "name": f"Instrument {isin}",
+                "instrumentType": {"mainType": instrument_type},
+                "instrumentTypeDisplayName": _TYPE_DISPLAY_NAMES[instrument_type],
+                "price": price,
+                "close": round(price * 0.99, 2),
+                "changePercent": 1.0,
+                "changeAbsolute": round(price * 0.01, 2),
+                "bid": round(price - 0.01, 2),
+                "bidDate": "2026-01-02T10:00:00+01:00",
+                "ask": round(price + 0.01, 2),
+                "askDate": "2026-01-02T10:00:00+01:00",
+                "wkn": isin[3:9],
+                "isin": isin,
+                "internalIsin": isin,
+                "stockMarket": "Stub Exchange",  # Unbekannter Handelsplatz: immer geöffnet
+                "priceChangeDate": "2026-01-02T10:00:00+01:00",
+                "currency": "EUR",
+                "currencySign": "€",
+            }
+
+        return await self._respond("instrumentheader", request, body)
+
+    async def priceinformation(self, request):
+        """Handle a priceinformation request."""
+        isin = request.match_info["isin"]
+
+        def body():
+            price = self._price(isin)
+            return {
+                "data": [
+                    {"id": "DailyLow", "fieldValue": {"value": round(price * 0.98, 2)}},
+                    {"id": "DailyHigh", "fieldValue": {"value": round(price * 1.02, 2)}},
+                    {"id": "FiftyTwoWeekLow", "fieldValue": {"value": round(price * 0.7, 2)}},
+                    {"id": "FiftyTwoWeekHigh", "fieldValue": {"value": round(price * 1.3, 2)}},
+                ]
+            }
+
+        return await self._respond("priceinformation", request, body)
+
+    async def async_start(self, host="127.0.0.1", port=0):
+        """Start the stub server and return its API base URL."""
+        app = web.Application()
+        app.router.add_get("/api/v1/components/instrumentheader/{isin}", self.instrumentheader)
+        app.router.add_get("/api/v1/components/priceinformation/{isin}", self.priceinformation)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}/api/v1/components"
+        return self.base_url
+
+    async def async_stop(self):
+        """Stop the stub server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
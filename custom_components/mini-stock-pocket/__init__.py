@@ -1,28 +1,150 @@
 """ISIN Sensor Integration."""
+import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import entity_registry as er
-from .const import DOMAIN
+from homeassistant.helpers.start import async_at_started
+from .const import (
+    CONF_BASE_CURRENCY,
+    CONF_CONNECTION_LIMIT,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_DNS_CACHE_TTL,
+    CONF_FRESHNESS_WINDOW,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_REFRESH_INTERVAL,
+    CONF_REQUESTS_PER_SECOND,
+    CONF_SETTINGS,
+    DATA_CONFIG,
+    DEFAULT_CONNECTION_LIMIT,
+    DEFAULT_DNS_CACHE_TTL,
+    DEFAULT_FRESHNESS_WINDOW,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_REQUESTS_PER_SECOND,
+    DOMAIN,
+    SCHEDULE_SETTINGS,
+)
+from .coordinator import ISINDataUpdateCoordinator
+from .fx import async_get_exchange_rates
+from .portfolio import PortfolioTotals
+from .quote_registry import async_get_quote_registry
+from .response_cache import async_get_response_cache
+from .services import async_setup_services
+from .session import async_close_session
 import logging
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = vol.Schema(
+    {
+        DOMAIN: vol.Schema(
+            {
+                vol.Optional(CONF_CONNECTION_LIMIT, default=DEFAULT_CONNECTION_LIMIT): cv.positive_int,
+                vol.Optional(CONF_DNS_CACHE_TTL, default=DEFAULT_DNS_CACHE_TTL): cv.positive_int,
+                vol.Optional(CONF_MAX_CONCURRENT_REQUESTS, default=DEFAULT_MAX_CONCURRENT_REQUESTS): cv.positive_int,
+                vol.Optional(CONF_REQUESTS_PER_SECOND, default=DEFAULT_REQUESTS_PER_SECOND): vol.All(
+                    vol.Coerce(float), vol.Range(min=0.1)
+                ),
+                vol.Optional(CONF_FRESHNESS_WINDOW, default=DEFAULT_FRESHNESS_WINDOW): cv.positive_int,
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
 class ISINHub:
     """Class to manage ISIN Hub."""
 
-    def __init__(self, hub_name, sensors):
+    def __init__(self, hass, hub_name, sensors, settings=None):
+        self.hass = hass
         self.hub_name = hub_name
-        self.sensors = sensors
+        self.sensors = [dict(sensor) for sensor in sensors]
+        self.settings = dict(settings or {})
+        self.coordinator = ISINDataUpdateCoordinator(hass, self)
+        self.coordinator.registry.register(hub_name, self.isins)
+        self.entities = {}  # ISIN -> ISINSensor, wird von der Sensor-Plattform gepflegt
+        self.totals = PortfolioTotals(async_get_exchange_rates(hass), self.settings.get(CONF_BASE_CURRENCY))
+        self.portfolio_entities = []  # Summen-Sensoren des Hubs
+        self.async_add_sensors = None  # Callback der Sensor-Plattform
 
     def update_sensors(self, sensors):
         """Update the sensors in the hub."""
         _LOGGER.debug("Updating sensors for hub: %s with sensors: %s", self.hub_name, sensors)
-        self.sensors = sensors
+        self.sensors = [dict(sensor) for sensor in sensors]
+        self.coordinator.registry.register(self.hub_name, self.isins)
+
+    @property
+    def isins(self):
+        """Return the ISINs held by the hub."""
+        return [sensor["isin"].upper() for sensor in self.sensors]
+
+    def unique_id(self, isin):
+        """Return the unique ID of a holding, scoped to the hub so several hubs can hold the same ISIN."""
+        return f"{self.hub_name}_{isin.upper()}"
+
+    async def async_update_exchange_rates(self):
+        """Fetch the exchange rates if needed and recompute the portfolio sensors."""
+        await self.totals.exchange_rates.async_refresh()
+        for entity in self.portfolio_entities:
+            entity.async_update_from_hub()
+
+    @callback
+    def async_apply_sensors(self, sensors):
+        """Apply a changed sensor list without reloading the config entry."""
+        old = {sensor["isin"].upper(): sensor for sensor in self.sensors}
+        new = {sensor["isin"].upper(): sensor for sensor in sensors}
+        self.update_sensors(sensors)
+
+        # Entfernte Positionen: nur die betroffene Entität löschen
+        entity_registry = er.async_get(self.hass)
+        for isin in old.keys() - new.keys():
+            entity = self.entities.pop(isin, None)
+            entity_id = entity_registry.async_get_entity_id("sensor", DOMAIN, self.unique_id(isin))
+            if entity_id:
+                entity_registry.async_remove(entity_id)
+            elif entity is not None:
+                self.hass.async_create_task(entity.async_remove())
+            _LOGGER.debug("Removed sensor with ISIN %s from hub %s", isin, self.hub_name)
+
+        # Geänderte Anzahl oder Totband: lokal übernehmen, ohne API-Abfrage
+        for isin, sensor in new.items():
+            entity = self.entities.get(isin)
+            if isin in old and entity is not None and sensor != old[isin]:
+                entity.async_update_config(sensor)
+
+        # Neue Positionen: Kurs aus der Prüfung im Options Flow übernehmen, sonst nur diese ISINs abfragen
+        added = [isin for isin in new if isin not in old]
+        if added and self.async_add_sensors is not None:
+            pending = self.coordinator.seed_validated(added)
+            self.async_add_sensors([new[isin] for isin in added])
+            if pending:
+                self.hass.async_create_task(self.coordinator.async_refresh_isins(pending))
+
+        # Summen-Sensoren aus den zwischengespeicherten Kursen neu berechnen
+        for entity in self.portfolio_entities:
+            entity.async_update_from_hub()
 
 async def async_setup(hass: HomeAssistant, config: dict):
     """Set up the ISIN Sensor integration from configuration.yaml."""
     hass.data.setdefault(DOMAIN, {})
+    hass.data[DATA_CONFIG] = config.get(DOMAIN, {})
+    await async_get_response_cache(hass)
+    async_setup_services(hass)
+
+    @callback
+    def _async_prune_response_cache(hass):
+        """Drop cached responses of ISINs that were only validated or belong to deleted hubs."""
+        async_get_quote_registry(hass).async_prune()
+
+    async_at_started(hass, _async_prune_response_cache)
+
+    async def _async_close_session(event):
+        """Close the shared HTTP session when Home Assistant stops."""
+        await async_close_session(hass)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_session)
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
@@ -41,60 +163,108 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         )
 
     _LOGGER.debug("Setting up hub: %s with sensors: %s", hub_name, sensors)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][hub_name] = ISINHub(hub_name, sensors)
+    hub = ISINHub(hass, hub_name, sensors, entry.data.get(CONF_SETTINGS))
+    hass.data[DOMAIN][hub_name] = hub
+
+    # Alte unique_ids (nur die ISIN) auf die je Hub eindeutigen unique_ids umstellen
+    isins = set(hub.isins)
+
+    @callback
+    def _async_migrate_unique_id(entity_entry):
+        """Scope a plain ISIN unique_id to the hub."""
+        if entity_entry.domain == "sensor" and entity_entry.unique_id in isins:
+            return {"new_unique_id": hub.unique_id(entity_entry.unique_id)}
+        return None
+
+    await er.async_migrate_entries(hass, entry.entry_id, _async_migrate_unique_id)
+
+    # Zuletzt bekannte Kurse aus dem persistenten Cache sofort bereitstellen
+    hub.coordinator.data = hub.coordinator.cached_quotes()
 
     try:
         # Forward the entry setup to the sensor platform
         await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
     except Exception as e:
         hass.data[DOMAIN].pop(hub_name, None)
+        hub.coordinator.registry.unregister(hub_name)
         raise ConfigEntryNotReady(f"Error setting up ISIN Sensor: {e}")
 
+    # Erste Abfrage im Hintergrund, damit der Start nicht auf die API wartet
+    entry.async_create_background_task(
+        hass, hub.coordinator.async_refresh(), f"{DOMAIN} {hub_name} first refresh"
+    )
+
     return True
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload an ISIN Sensor config entry."""
     hub_name = entry.data["hub_name"]
+    hub = hass.data[DOMAIN][hub_name]
 
     # Entferne alle zugehörigen Entitäten aus dem Entity Registry
     entity_registry = er.async_get(hass)
     sensors = entry.data.get("sensors", [])
     for sensor in sensors:
-        unique_id = sensor["isin"].upper()  # ISIN als unique_id
-        entity_entry = next(
-            (entry for entry in entity_registry.entities.values() if entry.unique_id == unique_id),
-            None
-        )
-        if entity_entry:
-            entity_registry.async_remove(entity_entry.entity_id)
+        entity_id = entity_registry.async_get_entity_id("sensor", DOMAIN, hub.unique_id(sensor["isin"]))
+        if entity_id:
+            entity_registry.async_remove(entity_id)
 
     # Unload the sensor platform
     unload_ok = await hass.config_entries.async_forward_entry_unload(entry, "sensor")
     if unload_ok:
-        hass.data[DOMAIN].pop(hub_name, None)
+        hass.data[DOMAIN].pop(hub_name)
+        # Kurse, die kein anderer Hub hält, freigeben
+        hub.coordinator.registry.unregister(hub_name)
+
+    # Die gemeinsame Session schließen, sobald kein Hub mehr geladen ist
+    if not hass.data[DOMAIN]:
+        await async_close_session(hass)
 
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Drop the cached responses of a deleted hub that no other hub holds."""
+    await async_get_response_cache(hass)  # Auch für nie geladene Hubs
+    async_get_quote_registry(hass).async_prune(exclude_entry_id=entry.entry_id)
+
 async def async_update_options(hass: HomeAssistant, entry: ConfigEntry):
     """Handle updates to the options of a config entry."""
     hub_name = entry.data["hub_name"]
     sensors = entry.options.get("sensors", entry.data.get("sensors", []))
 
-    # Update the hub with the new sensors
+    # Änderungen direkt im Hub anwenden, ohne den Config Entry neu zu laden
     if hub_name in hass.data[DOMAIN]:
-        hass.data[DOMAIN][hub_name].update_sensors(sensors)
-
-    # Update the config entry data
-    hass.config_entries.async_update_entry(
-        entry,
-        data={**entry.data, "sensors": sensors},  # Synchronisiere die Sensoren mit "data"
-        options={**entry.options, "sensors": sensors},  # Synchronisiere die Sensoren mit "options"
-    )
+        hub = hass.data[DOMAIN][hub_name]
+        settings = dict(entry.data.get(CONF_SETTINGS, {}))
+        if settings.get(CONF_DIAGNOSTIC_SENSORS, False) != hub.settings.get(CONF_DIAGNOSTIC_SENSORS, False):
+            # Diagnose-Sensoren werden nur beim Einrichten der Plattform angelegt
+            hass.config_entries.async_schedule_reload(entry.entry_id)
+            return
+        base_currency = settings.get(CONF_BASE_CURRENCY)
+        # Neue Positionen übernehmen den Kurs aus der Prüfung, entfernte brauchen keine Abfrage
+        old_intervals = _refresh_intervals(hub.sensors)
+        new_intervals = _refresh_intervals(sensors)
+        schedule_changed = any(
+            settings.get(key) != hub.settings.get(key) for key in SCHEDULE_SETTINGS
+        ) or any(
+            new_intervals[isin] != old_intervals[isin] for isin in new_intervals.keys() & old_intervals.keys()
+        )
+        hub.settings = settings
+        if base_currency != hub.totals.base_currency:
+            hub.totals.base_currency = base_currency
+            if base_currency:
+                hass.async_create_task(hub.async_update_exchange_rates())
+        hub.async_apply_sensors(sensors)
+        if schedule_changed:
+            # Zeitplan sofort neu berechnen statt erst nach dem bisherigen Intervall
+            await hub.coordinator.async_request_refresh()
 
-    # Reload the entry to apply changes
-    await hass.config_entries.async_reload(entry.entry_id)
+def _refresh_intervals(sensors):
+    """Return the per-holding refresh intervals keyed by ISIN."""
+    return {sensor["isin"].upper(): sensor.get(CONF_REFRESH_INTERVAL) for sensor in sensors}
 
 async def async_update_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Handle updates to a config entry."""
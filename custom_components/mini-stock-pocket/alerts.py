@@ -0,0 +1,73 @@
+"""Price alert rules per holding with crossing detection and hysteresis."""
+from .const import (
+    CONF_ALERT_52W_HIGH,
+    CONF_ALERT_52W_LOW,
+    CONF_ALERT_ABOVE,
+    CONF_ALERT_BELOW,
+    CONF_ALERT_HYSTERESIS,
+    DEFAULT_ALERT_HYSTERESIS,
+)
+
+# Regel -> (Richtung, Attribut der Quote als Schwellwert oder None für einen festen Kurs)
+ALERT_RULES = {
+    CONF_ALERT_ABOVE: (1, None),
+    CONF_ALERT_BELOW: (-1, None),
+    CONF_ALERT_52W_HIGH: (1, "fiftyTwoWeekHigh"),
+    CONF_ALERT_52W_LOW: (-1, "fiftyTwoWeekLow"),
+}
+
+
+class PriceAlerts:
+    """Track for every alert rule of a hub whether it is armed.
+
+    A rule fires once when the price crosses its threshold and is armed again only after
+    the price has moved back by the hysteresis, so a price hovering at the threshold does
+    not fire repeatedly.
+    """
+
+    def __init__(self):
+        """Initialize without state."""
+        self._armed = {}  # (ISIN, Regel) -> (Schwellwert, scharf)
+
+    def evaluate(self, isin, quote, alerts):
+        """Return the rules crossed by a new quote as (rule, threshold) pairs."""
+        price = quote.price
+        if price is None:
+            return []
+        hysteresis = alerts.get(CONF_ALERT_HYSTERESIS, DEFAULT_ALERT_HYSTERESIS) / 100
+        crossed = []
+        for rule, (direction, field) in ALERT_RULES.items():
+            key = (isin, rule)
+            if field is None:
+                threshold = alerts.get(rule)
+            else:
+                threshold = quote.get(field) if alerts.get(rule) else None
+            if threshold is None:
+                self._armed.pop(key, None)
+                continue
+
+            beyond = price >= threshold if direction > 0 else price <= threshold
+            state = self._armed.get(key)
+            if state is None or (field is None and state[0] != threshold):
+                # Neue oder geänderte Regel: nur den Zustand merken, kein Ereignis beim Start
+                self._armed[key] = (threshold, not beyond)
+                continue
+
+            armed = state[1]
+            if armed and beyond:
+                crossed.append((rule, threshold))
+                armed = False
+            elif not armed:
+                # Erst nach Rückkehr um die Hysterese wieder scharf schalten
+                if direction > 0:
+                    armed = price < threshold * (1 - hysteresis)
+                else:
+                    armed = price > threshold * (1 + hysteresis)
+            self._armed[key] = (threshold, armed)
+        return crossed
+
+    def retain(self, isins):
+        """Drop the state of ISINs the hub no longer holds."""
+        isins = set(isins)
+        for key in [key for key in self._armed if key[0] not in isins]:
+            del self._armed[key]
@@ -0,0 +1,304 @@
+"""Async client for the ING component API."""
+from __future__ import annotations
+
+import aiohttp
+import asyncio
+import logging
+from dataclasses import dataclass, replace
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+from .cache import TTLCache
+from .circuit_breaker import CircuitBreaker
+from .metrics import ApiMetrics
+from .const import (
+    API_BACKOFF_BASE,
+    API_BACKOFF_MAX,
+    API_BASE_URL,
+    CIRCUIT_BREAKER_THRESHOLD,
+    DATA_CLIENT,
+    DATA_RESPONSE_CACHE,
+    ISIN_BACKOFF_BASE,
+    ISIN_BACKOFF_MAX,
+    PRICE_INFORMATION_CACHE_SIZE,
+    PRICE_INFORMATION_INTERVAL,
+    REQUEST_TIMEOUT,
+    VALIDATION_CACHE_SIZE,
+    VALIDATION_NEGATIVE_TTL,
+    VALIDATION_TTL,
+)
+from .quote import PriceInformation, Quote, parse_price_information
+from .response_cache import async_get_response_cache
+from .scheduler import async_get_scheduler
+from .session import async_get_session
+
+_LOGGER = logging.getLogger(__name__)
+
+# Instrumenttypen mit zusätzlicher priceinformation-Abfrage
+PRICE_INFORMATION_TYPES = ("Share", "Bond")
+
+
+@dataclass
+class FetchResult:
+    """Result of fetching a single ISIN."""
+
+    isin: str
+    quote: Quote | None = None
+    status: int | None = None
+    error: str | None = None
+    not_modified: bool = False
+    skipped: bool = False  # Wegen offenem Circuit Breaker nicht abgefragt
+    unexpected: bool = False  # Unerwarteter Fehler, z. B. eine nicht auswertbare Antwort
+
+    @property
+    def is_outage(self):
+        """Check whether the failure points to an API outage rather than to the ISIN."""
+        if self.unexpected:
+            return False  # Betrifft nur diese ISIN, nicht die Erreichbarkeit der API
+        return self.status is None or self.status >= 500 or self.status == 429
+
+
+class IngApiClient:
+    """Client for the instrumentheader and priceinformation endpoints."""
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the client."""
+        self._hass = hass
+        self._response_cache = hass.data[DATA_RESPONSE_CACHE]
+        self._price_information = TTLCache(
+            PRICE_INFORMATION_CACHE_SIZE, PRICE_INFORMATION_INTERVAL.total_seconds()
+        )
+        # ISIN -> Zeitpunkt der erfolgreichen Prüfung oder False
+        self._validation = TTLCache(VALIDATION_CACHE_SIZE, VALIDATION_TTL.total_seconds())
+        self.metrics = ApiMetrics()
+        self.breaker = CircuitBreaker(
+            CIRCUIT_BREAKER_THRESHOLD, API_BACKOFF_BASE.total_seconds(), API_BACKOFF_MAX.total_seconds()
+        )
+        self._isin_breakers = {}  # ISIN -> CircuitBreaker, nur für fehlerhafte ISINs
+        self._in_flight = {}  # (Endpunkt, ISIN) -> laufende Abfrage
+
+    def isin_breaker(self, isin):
+        """Return the circuit breaker of an ISIN, if it has failed recently."""
+        return self._isin_breakers.get(isin)
+
+    def cached_quote(self, isin) -> Quote | None:
+        """Return the last known quote of an ISIN without a request."""
+        return self._response_cache.get_quote(isin)
+
+    async def _async_single_flight(self, key, request, isin):
+        """Share one in-flight request per endpoint and ISIN between concurrent callers."""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._in_flight[key] = self._hass.async_create_task(request(isin))
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            _LOGGER.debug("Joining in-flight %s request for ISIN %s", key[0], isin)
+        # Der Abbruch eines Aufrufers darf die gemeinsame Abfrage nicht abbrechen
+        return await asyncio.shield(task)
+
+    async def async_fetch_header(self, isin) -> FetchResult:
+        """Fetch the instrumentheader of an ISIN, shared with concurrent callers."""
+        return await self._async_single_flight(("instrumentheader", isin), self._async_request_header, isin)
+
+    async def _async_request_header(self, isin) -> FetchResult:
+        """Request the instrumentheader of an ISIN, using a conditional request."""
+        cached = self._response_cache.get_quote(isin)
+        headers = self._response_cache.request_headers(isin) if cached is not None else {}
+        url = f"{API_BASE_URL}/instrumentheader/{isin}"
+        session = async_get_session(self._hass)
+        metrics = self.metrics
+        try:
+            async with async_get_scheduler(self._hass).async_slot():
+                started = metrics.start()
+                async with session.get(url, headers=headers, timeout=REQUEST_TIMEOUT) as response:
+                    metrics.record_response("instrumentheader", response.status, started)
+                    if headers:
+                        metrics.record_cache("instrumentheader", response.status == 304)
+                    if response.status == 304 and cached is not None:
+                        # Unverändert: weder JSON dekodieren noch Attribute neu aufbauen
+                        _LOGGER.debug("Instrumentheader for ISIN %s not modified", isin)
+                        return FetchResult(isin, cached, response.status, not_modified=True)
+                    if response.status != 200:
+                        _LOGGER.warning("Non-200 response for ISIN %s: %s", isin, response.status)
+                        return FetchResult(isin, status=response.status, error=f"HTTP {response.status}")
+
+                    data = await response.json()
+                    if not data or "price" not in data:
+                        _LOGGER.warning("Invalid or empty response for ISIN %s", isin)
+                        return FetchResult(isin, status=response.status, error="invalid response")
+
+                    quote = Quote.from_instrumentheader(data)
+                    self._response_cache.async_set(
+                        isin, quote, response.headers.get("ETag"), response.headers.get("Last-Modified")
+                    )
+                    _LOGGER.debug("Fetched instrumentheader for ISIN %s, type: %s", isin, quote.instrument_type)
+                    return FetchResult(isin, quote, response.status)
+        except aiohttp.ClientError as e:
+            metrics.record_error("instrumentheader")
+            _LOGGER.error("Error fetching data for ISIN %s: %s", isin, e)
+            return FetchResult(isin, error=str(e))
+        except asyncio.TimeoutError:
+            metrics.record_timeout("instrumentheader")
+            _LOGGER.error("Timeout fetching data for ISIN %s", isin)
+            return FetchResult(isin, error="timeout")
+
+    async def async_fetch_price_information(self, isin) -> PriceInformation | None:
+        """Return the daily and 52-week range of an ISIN, cached with its own TTL."""
+        price_information = self._price_information.get(isin)
+        self.metrics.record_cache("priceinformation", price_information is not None)
+        if price_information is not None:
+            return price_information
+        return await self._async_single_flight(
+            ("priceinformation", isin), self._async_request_price_information, isin
+        )
+
+    async def _async_request_price_information(self, isin) -> PriceInformation | None:
+        """Request the price information of an ISIN and cache it."""
+        url = f"{API_BASE_URL}/priceinformation/{isin}"
+        session = async_get_session(self._hass)
+        metrics = self.metrics
+        try:
+            async with async_get_scheduler(self._hass).async_slot():
+                started = metrics.start()
+                async with session.get(url, timeout=REQUEST_TIMEOUT) as response:
+                    metrics.record_response("priceinformation", response.status, started)
+                    if response.status != 200:
+                        _LOGGER.warning("Non-200 response for price information ISIN %s: %s", isin, response.status)
+                        return None
+
+                    price_data = await response.json()
+                    if not price_data or "data" not in price_data:
+                        _LOGGER.warning("Invalid or empty price information for ISIN %s", isin)
+                        return None
+        except aiohttp.ClientError as e:
+            metrics.record_error("priceinformation")
+            _LOGGER.error("Error fetching price information for ISIN %s: %s", isin, e)
+            return None
+        except asyncio.TimeoutError:
+            metrics.record_timeout("priceinformation")
+            _LOGGER.error("Timeout fetching price information for ISIN %s", isin)
+            return None
+
+        try:
+            price_information = parse_price_information(price_data)
+        except (AttributeError, KeyError, TypeError) as e:
+            _LOGGER.warning("Invalid price information for ISIN %s: %s", isin, e)
+            return None
+        self._price_information.set(isin, price_information)
+        _LOGGER.debug("Fetched price information for ISIN %s: %s", isin, price_information)
+        return price_information
+
+    async def async_fetch_quote(self, isin) -> FetchResult:
+        """Fetch the instrumentheader and, for shares and bonds, the price information."""
+        try:
+            result = await self.async_fetch_header(isin)
+        except Exception as e:
+            _LOGGER.exception("Unexpected error fetching data for ISIN %s: %s", isin, e)
+            return FetchResult(isin, error=str(e), unexpected=True)
+        quote = result.quote
+        if quote is None or quote.instrument_type not in PRICE_INFORMATION_TYPES:
+            return result
+
+        try:
+            fresh = self._price_information.get(isin) is None
+            price_information = await self.async_fetch_price_information(isin)
+            if price_information is None or (result.not_modified and not fresh):
+                # Die zwischengespeicherte Quote enthält die Spannen bereits
+                return result
+
+            # Zusätzliche Attribute hinzufügen Aktie & Anleihe; das Ergebnis ist mit anderen Aufrufern geteilt
+            result = replace(result, quote=quote.with_price_information(price_information), not_modified=False)
+            self._response_cache.async_set(isin, result.quote)
+        except Exception as e:
+            # Den bereits abgefragten Kurs ohne Spannen verwenden
+            _LOGGER.exception("Unexpected error adding price information for ISIN %s: %s", isin, e)
+        return result
+
+    async def async_fetch_guarded(self, isin) -> FetchResult:
+        """Fetch a quote unless the API or the ISIN circuit breaker is open."""
+        isin_breaker = self._isin_breakers.get(isin)
+        if (isin_breaker is not None and isin_breaker.blocked()) or self.breaker.blocked():
+            return FetchResult(isin, skipped=True)
+        isin_probe = isin_breaker is not None and isin_breaker.acquire()
+        probe = self.breaker.acquire()
+
+        try:
+            result = await self.async_fetch_quote(isin)
+        except asyncio.CancelledError:
+            # Eine abgebrochene Probe freigeben, sonst bliebe der Breaker dauerhaft halb offen
+            if isin_probe:
+                isin_breaker.release()
+            if probe:
+                self.breaker.release()
+            raise
+        if result.quote is not None:
+            self.breaker.record_success()
+            self._isin_breakers.pop(isin, None)
+        elif result.is_outage:
+            was_open = self.breaker.is_open
+            self.breaker.record_failure()
+            if isin_breaker is not None:
+                isin_breaker.release()
+            if self.breaker.is_open and not was_open:
+                _LOGGER.warning("ING API unavailable, pausing requests after %s failures", self.breaker.failures)
+        else:
+            # Die API antwortet, aber nicht für diese ISIN
+            self.breaker.record_success()
+            if isin_breaker is None:
+                isin_breaker = self._isin_breakers[isin] = CircuitBreaker(
+                    CIRCUIT_BREAKER_THRESHOLD, ISIN_BACKOFF_BASE.total_seconds(), ISIN_BACKOFF_MAX.total_seconds()
+                )
+            isin_breaker.record_failure()
+        return result
+
+    async def async_fetch_many(self, isins) -> dict[str, FetchResult]:
+        """Fetch several ISINs concurrently and return a result per ISIN."""
+        results = await asyncio.gather(*(self.async_fetch_guarded(isin) for isin in isins))
+        return {result.isin: result for result in results}
+
+    async def async_validate_isin(self, isin) -> bool:
+        """Check whether the API knows an ISIN, using cached positive and negative results."""
+        validated = self._validation.get(isin)
+        self.metrics.record_cache("validation", validated is not None)
+        if validated is not None:
+            return bool(validated)
+
+        result = await self.async_fetch_header(isin)
+        if result.quote is not None:
+            self._validation.set(isin, dt_util.utcnow())
+            return True
+        # Netzwerk- und Serverfehler sagen nichts über die ISIN aus
+        if result.status is not None and result.status < 500 and result.status != 429:
+            self._validation.set(isin, False, VALIDATION_NEGATIVE_TTL.total_seconds())
+        return False
+
+    @callback
+    def async_prune(self, keep):
+        """Drop cached responses of ISINs that are neither in keep nor recently validated."""
+        # Nur geprüfte, nie hinzugefügte ISINs fallen nach Ablauf der Prüfung heraus
+        self._response_cache.async_prune(lambda isin: isin in keep or bool(self._validation.get(isin)))
+
+    def validated_quote(self, isin):
+        """Return the time and quote of a recent successful validation, or None."""
+        validated = self._validation.get(isin)
+        if not validated:
+            return None
+        quote = self._response_cache.get_quote(isin)
+        return None if quote is None else (validated, quote)
+
+
+@callback
+def async_get_client(hass: HomeAssistant) -> IngApiClient:
+    """Return the integration-wide API client, the response cache has to be loaded already."""
+    client = hass.data.get(DATA_CLIENT)
+    if client is None:
+        client = hass.data[DATA_CLIENT] = IngApiClient(hass)
+    return client
+
+
+async def async_load_client(hass: HomeAssistant) -> IngApiClient:
+    """Return the integration-wide API client, loading the response cache on first use.
+
+    The config flow can run before async_setup, e.g. when the first hub is created.
+    """
+    await async_get_response_cache(hass)
+    return async_get_client(hass)
@@ -0,0 +1,41 @@
+"""Value-weighted allocation of a request budget across holdings."""
+import math
+from datetime import timedelta
+
+HOUR = timedelta(hours=1)
+
+
+def guaranteed_rate(interval, max_staleness):
+    """Return the requests per hour an ISIN gets regardless of its weight."""
+    return HOUR / max(interval, max_staleness)
+
+
+def allocate_intervals(weights, shortest, budget, max_staleness):
+    """Return a refresh interval per ISIN that spends a budget of requests per hour by weight.
+
+    Every ISIN first gets one request per max_staleness, or per its own interval if that is
+    longer, the rest of the budget is split in proportion to the weights. No ISIN is refreshed
+    more often than its shortest interval, the share it cannot use goes to the others. If the
+    budget does not even cover the guaranteed requests, the guarantee wins.
+    """
+    caps = {isin: HOUR / shortest[isin] for isin in weights}
+    # Langsamere Intervalle als max_staleness bleiben unverändert, das Budget erhöht sie nicht
+    rates = {isin: guaranteed_rate(shortest[isin], max_staleness) for isin in weights}  # Anfragen je Stunde
+    remaining = budget - math.fsum(rates.values())
+    uncapped = {isin for isin, weight in weights.items() if weight > 0 and rates[isin] < caps[isin]}
+
+    # Wasserstandsverfahren: Positionen am Limit kappen und den Rest neu verteilen
+    while remaining > 0 and uncapped:
+        total = math.fsum(weights[isin] for isin in uncapped)
+        capped = [isin for isin in uncapped if rates[isin] + remaining * weights[isin] / total >= caps[isin]]
+        if not capped:
+            for isin in uncapped:
+                rates[isin] += remaining * weights[isin] / total
+            break
+        for isin in capped:
+            remaining -= caps[isin] - rates[isin]
+            rates[isin] = caps[isin]
+            uncapped.discard(isin)
+
+    # Auf ganze Minuten aufrunden, damit das Budget nicht überschritten wird und Buckets entstehen
+    return {isin: timedelta(minutes=math.ceil(round(60 / rate, 6))) for isin, rate in rates.items()}
@@ -0,0 +1,44 @@
+"""Small in-memory caches for the ISIN Sensor integration."""
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Mapping with a per-entry time to live and least-recently-used eviction."""
+
+    def __init__(self, maxsize, ttl):
+        """Initialize the cache, ttl is given in seconds."""
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data = OrderedDict()  # key -> (Ablaufzeit, Wert)
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """Return a cached value or default if it is missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl=None):
+        """Store a value and evict the least recently used entries, ttl overrides the default."""
+        self._data[key] = (time.monotonic() + (self._ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove a key and return its value."""
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        """Remove all entries."""
+        self._data.clear()
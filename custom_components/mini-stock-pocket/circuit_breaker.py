@@ -0,0 +1,74 @@
+"""Circuit breaker with jittered exponential backoff for the ING API."""
+import random
+import time
+
+
+class CircuitBreaker:
+    """Stop requests after repeated failures and probe once before resuming.
+
+    Closed: all requests pass. Open: requests are skipped until the backoff has elapsed.
+    Half-open: a single probe request passes, its result closes or re-opens the breaker.
+    """
+
+    def __init__(self, threshold, base_delay, max_delay):
+        """Initialize a closed breaker, delays are given in seconds."""
+        self._threshold = threshold
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self.failures = 0  # Aufeinanderfolgende Fehler
+        self.trips = 0  # Öffnungen seit dem letzten Erfolg, bestimmt den Backoff
+        self._open_until = None
+        self._probing = False
+
+    @property
+    def is_open(self):
+        """Return True while the breaker is open or half-open."""
+        return self._open_until is not None
+
+    def blocked(self):
+        """Check whether a request has to be skipped, without changing the state."""
+        if self._open_until is None:
+            return False
+        return self._probing or time.monotonic() < self._open_until
+
+    def acquire(self):
+        """Register a request that passed and return True if it is the probe after the backoff."""
+        if self._open_until is None:
+            return False
+        self._probing = True
+        return True
+
+    def release(self):
+        """Give up a probe whose result says nothing about this breaker."""
+        self._probing = False
+
+    def record_success(self):
+        """Close the breaker."""
+        self.failures = self.trips = 0
+        self._open_until = None
+        self._probing = False
+
+    def record_failure(self):
+        """Count a failure and open the breaker once the threshold is reached."""
+        if self._open_until is not None and not self._probing:
+            return  # Bereits offen: verspätete Antworten derselben Störung nicht erneut zählen
+        half_open = self._probing
+        self._probing = False
+        self.failures += 1
+        if half_open or self.failures >= self._threshold:
+            # Volle Verzögerung mal Zufallsfaktor, damit nicht alle gleichzeitig wieder anfragen
+            delay = min(self._max_delay, self._base_delay * 2 ** self.trips) * random.uniform(0.5, 1.0)
+            self.trips += 1
+            self._open_until = time.monotonic() + delay
+
+    def as_dict(self):
+        """Return the state for diagnostics."""
+        remaining = None
+        if self._open_until is not None:
+            remaining = round(max(0.0, self._open_until - time.monotonic()), 1)
+        return {
+            "state": "half_open" if self._probing else "open" if self.is_open else "closed",
+            "failures": self.failures,
+            "trips": self.trips,
+            "retry_in_seconds": remaining,
+        }
@@ -1,36 +1,145 @@
 """Config Flow for ISIN Sensor integration."""
-import aiohttp
 import asyncio
+import csv
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
-from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers import config_validation as cv  # Import für Float-Validierung
+from homeassistant.helpers.selector import TextSelector, TextSelectorConfig
+from homeassistant.helpers.translation import async_get_translations
 import logging
-from .const import DOMAIN
+from .api import async_load_client
+from .const import (
+    CONF_ALERT_52W_HIGH,
+    CONF_ALERT_52W_LOW,
+    CONF_ALERT_ABOVE,
+    CONF_ALERT_BELOW,
+    CONF_ALERT_HYSTERESIS,
+    CONF_ALERTS,
+    CONF_BASE_CURRENCY,
+    CONF_CHANGE_DETECTION,
+    CONF_DEADBAND_ABSOLUTE,
+    CONF_DEADBAND_PERCENT,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_HEARTBEAT,
+    CONF_MAX_STALENESS,
+    CONF_REFRESH_INTERVAL,
+    CONF_REQUEST_BUDGET,
+    CONF_SETTINGS,
+    CONF_TYPE_INTERVALS,
+    CONF_VOLATILITY_WEIGHTING,
+    DEFAULT_ALERT_HYSTERESIS,
+    DEFAULT_HEARTBEAT,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_REFRESH_INTERVAL,
+    DOMAIN,
+)
+from .isin import is_valid_isin_format
 
 _LOGGER = logging.getLogger(__name__)
 
-async def is_valid_isin(isin):
-    """Validate the ISIN format by checking the API asynchronously."""
-    if len(isin) != 12:  # Basic ISIN format validation
-        return False
+# Optionale Einstellungen je Position, leer bedeutet: Einstellung des Depots verwenden
+HOLDING_OVERRIDES = (CONF_DEADBAND_ABSOLUTE, CONF_DEADBAND_PERCENT, CONF_REFRESH_INTERVAL)
+REFRESH_INTERVAL_VALIDATOR = vol.All(vol.Coerce(int), vol.Range(min=1))
 
-    url = f"https://component-api.wertpapiere.ing.de/api/v1/components/instrumentheader/{isin}"
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=10) as response:
-                if response.status == 404:
-                    return False
-                response.raise_for_status()
-                return True
-    except asyncio.TimeoutError:
-        _LOGGER.error("Timeout while validating ISIN: %s", isin)
-        return False
-    except aiohttp.ClientError as e:
-        _LOGGER.error("Error validating ISIN: %s", e)
+async def is_valid_isin(hass, isin):
+    """Validate the ISIN offline first, then check with the API (cached) that it is known."""
+    isin = isin.upper()
+    if not is_valid_isin_format(isin):  # Aufbau und Prüfziffer ohne Netzwerkzugriff
         return False
 
+    client = await async_load_client(hass)  # Der Config Flow kann vor async_setup laufen
+    return await client.async_validate_isin(isin)
+
+
+BULK_IMPORT_SCHEMA_KEY = "holdings"
+
+
+def parse_holdings(text):
+    """Parse pasted CSV lines of ISIN, name and quantity.
+
+    Returns the parsed rows as (line, isin, name, quantity) and the invalid lines as (line, value, error).
+    """
+    rows, errors = [], []
+    for line, text_line in enumerate(text.splitlines(), start=1):
+        # Semikolon- oder tabulatorgetrennt (z. B. aus Excel) erlaubt ein Dezimalkomma
+        delimiter = ";" if ";" in text_line else "\t" if "\t" in text_line else ","
+        cells = [cell.strip() for cell in next(csv.reader([text_line], delimiter=delimiter), [])]
+        if not any(cells):
+            continue
+        if cells[0].lower() == "isin":
+            continue  # Kopfzeile
+        while len(cells) > 3 and not cells[-1]:
+            cells.pop()  # Abschließende Trennzeichen, z. B. aus Excel
+        # Weitere Spalten ablehnen, z. B. die Anzahl "1.234,5" in kommagetrennten Zeilen
+        if not 2 <= len(cells) <= 3 or not cells[0] or not cells[1]:
+            errors.append((line, cells[0], "invalid_format"))
+            continue
+
+        quantity = 0.0
+        if len(cells) > 2 and cells[2]:
+            value = cells[2]
+            if delimiter != "," and "," in value:
+                value = value.replace(".", "").replace(",", ".")
+            try:
+                quantity = float(value)
+            except ValueError:
+                quantity = -1
+            if not 0 <= quantity < float("inf"):
+                errors.append((line, cells[0], "invalid_quantity"))
+                continue
+        rows.append((line, cells[0].upper(), cells[1], round(quantity, 2)))
+    return rows, errors
+
+
+async def async_validate_holdings(hass, rows, errors, sensors):
+    """Validate parsed rows concurrently and return the new sensors.
+
+    Invalid rows are appended to errors. The number of parallel requests is capped by the
+    integration-wide request scheduler.
+    """
+    existing = {sensor["isin"].upper() for sensor in sensors}
+    candidates = []
+    for line, isin, name, quantity in rows:
+        if isin in existing:
+            errors.append((line, isin, "isin_already_exists"))
+            continue
+        existing.add(isin)
+        candidates.append((line, isin, name, quantity))
+
+    valid = await asyncio.gather(*(is_valid_isin(hass, isin) for _, isin, _, _ in candidates))
+    added = []
+    for (line, isin, name, quantity), is_valid in zip(candidates, valid):
+        if not is_valid:
+            errors.append((line, isin, "invalid_isin"))
+            continue
+        added.append({"isin": isin, "name": name, "quantity": quantity})
+    return added
+
+
+async def async_format_row_errors(hass, errors):
+    """Format the invalid rows for the form description in the configured language."""
+    if not errors:
+        return ""
+    translations = await async_get_translations(hass, hass.config.language, "exceptions", {DOMAIN})
+    return "\n".join(
+        "- " + translations.get(f"component.{DOMAIN}.exceptions.row_{error}.message", error).format(
+            line=line, value=value
+        )
+        for line, value, error in sorted(errors)
+    )
+
+
+def bulk_import_schema(text=None):
+    """Return the form schema of the bulk import step."""
+    return vol.Schema(
+        {
+            vol.Required(
+                BULK_IMPORT_SCHEMA_KEY, description={"suggested_value": text}
+            ): TextSelector(TextSelectorConfig(multiline=True)),
+        }
+    )
+
 
 class ISINSensorConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle the config flow for ISIN Sensor."""
@@ -47,6 +156,7 @@ class ISINSensorConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         data_schema = vol.Schema(
             {
                 vol.Required("hub_name"): str,
+                vol.Optional("bulk_import", default=False): bool,
             }
         )
 
@@ -57,6 +167,8 @@ class ISINSensorConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
             self.hub_name = user_input["hub_name"]
             self.sensors = []  # Initialize sensors as an empty list
+            if user_input.get("bulk_import"):
+                return await self.async_step_bulk_import()
             return await self.async_step_add_sensor()
 
         return self.async_show_form(
@@ -78,7 +190,7 @@ class ISINSensorConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             # Validate ISIN
-            if not await is_valid_isin(user_input["isin"]):
+            if not await is_valid_isin(self.hass, user_input["isin"]):
                 return self.async_show_form(
                     step_id="add_sensor",
                     data_schema=data_schema,
@@ -116,6 +228,34 @@ class ISINSensorConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors={}
         )
 
+    async def async_step_bulk_import(self, user_input=None):
+        """Add several sensors at once from pasted CSV lines."""
+        errors = {}
+        row_errors = []
+        text = None
+
+        if user_input is not None:
+            text = user_input[BULK_IMPORT_SCHEMA_KEY]
+            rows, row_errors = parse_holdings(text)
+            added = await async_validate_holdings(self.hass, rows, row_errors, self.sensors)
+            if row_errors:
+                errors[BULK_IMPORT_SCHEMA_KEY] = "invalid_rows"
+            elif not added:
+                errors[BULK_IMPORT_SCHEMA_KEY] = "no_rows"
+            else:
+                # Alle Zeilen gültig: der Hub wird in einem Schritt angelegt
+                return self.async_create_entry(
+                    title=self.hub_name,
+                    data={"hub_name": self.hub_name, "sensors": self.sensors + added},
+                )
+
+        return self.async_show_form(
+            step_id="bulk_import",
+            data_schema=bulk_import_schema(text),
+            errors=errors,
+            description_placeholders={"row_errors": await async_format_row_errors(self.hass, row_errors)},
+        )
+
     def _isin_exists(self, isin):
         """Check if an ISIN already exists in the current sensors."""
         return any(sensor["isin"] == isin for sensor in self.sensors)
@@ -145,18 +285,27 @@ class ISINSensorOptionsFlowHandler(config_entries.OptionsFlow):
         if user_input is not None:
             if user_input["action"] == "add_stock":
                 return await self.async_step_add_sensor()
+            elif user_input["action"] == "bulk_import":
+                return await self.async_step_bulk_import()
             elif user_input["action"] == "edit_quantity":
                 return await self.async_step_edit_quantity()
             elif user_input["action"] == "delete_stock":
                 return await self.async_step_delete_sensor()
+            elif user_input["action"] == "alerts":
+                return await self.async_step_alerts()
+            elif user_input["action"] == "settings":
+                return await self.async_step_settings()
 
         data_schema = vol.Schema(
             {
                 vol.Required("action"): vol.In(
                     {
                         "add_stock": "Neue Aktie hinzufügen",
+                        "bulk_import": "Mehrere Aktien importieren",
                         "edit_quantity": "Aktien Anzahl ändern",
                         "delete_stock": "Aktie löschen",
+                        "alerts": "Kursalarme",
+                        "settings": "Einstellungen",
                     }
                 )
             }
@@ -167,7 +316,7 @@ class ISINSensorOptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_add_sensor(self, user_input=None):
         """Add a new stock."""
         config_entry = self.hass.config_entries.async_get_entry(self.config_entry_id)
-        sensors = config_entry.data.get("sensors", [])
+        sensors = list(config_entry.data.get("sensors", []))
 
         data_schema = vol.Schema(
             {
@@ -180,7 +329,7 @@ class ISINSensorOptionsFlowHandler(config_entries.OptionsFlow):
 
         if user_input is not None:
             # Validate ISIN
-            if not await is_valid_isin(user_input["isin"]):
+            if not await is_valid_isin(self.hass, user_input["isin"]):
                 return self.async_show_form(
                     step_id="add_sensor",
                     data_schema=data_schema,
@@ -202,7 +351,7 @@ class ISINSensorOptionsFlowHandler(config_entries.OptionsFlow):
                 "quantity": round(user_input["quantity"], 2),  # Rundung auf 2 Nachkommastellen
             })
 
-            # Update the config entry
+            # Update the config entry, the hub adds the new entity live
             self.hass.config_entries.async_update_entry(
                 config_entry,
                 data={**config_entry.data, "sensors": sensors},
@@ -213,8 +362,6 @@ class ISINSensorOptionsFlowHandler(config_entries.OptionsFlow):
             if user_input.get("add_more_sensors"):
                 return await self.async_step_add_sensor()
 
-            # Reload the config entry to apply changes
-            await self.hass.config_entries.async_reload(config_entry.entry_id)
             return self.async_create_entry(title="", data={})
 
         return self.async_show_form(
@@ -223,6 +370,39 @@ class ISINSensorOptionsFlowHandler(config_entries.OptionsFlow):
             errors={}
         )
 
+    async def async_step_bulk_import(self, user_input=None):
+        """Add several stocks at once from pasted CSV lines."""
+        config_entry = self.hass.config_entries.async_get_entry(self.config_entry_id)
+        sensors = list(config_entry.data.get("sensors", []))
+        errors = {}
+        row_errors = []
+        text = None
+
+        if user_input is not None:
+            text = user_input[BULK_IMPORT_SCHEMA_KEY]
+            rows, row_errors = parse_holdings(text)
+            added = await async_validate_holdings(self.hass, rows, row_errors, sensors)
+            if row_errors:
+                errors[BULK_IMPORT_SCHEMA_KEY] = "invalid_rows"
+            elif not added:
+                errors[BULK_IMPORT_SCHEMA_KEY] = "no_rows"
+            else:
+                # Eine einzige Aktualisierung des Config Entry für den ganzen Import
+                sensors += added
+                self.hass.config_entries.async_update_entry(
+                    config_entry,
+                    data={**config_entry.data, "sensors": sensors},
+                    options={**config_entry.options, "sensors": sensors},
+                )
+                return self.async_create_entry(title="", data={})
+
+        return self.async_show_form(
+            step_id="bulk_import",
+            data_schema=bulk_import_schema(text),
+            errors=errors,
+            description_placeholders={"row_errors": await async_format_row_errors(self.hass, row_errors)},
+        )
+
     async def async_step_edit_quantity(self, user_input=None):
         """Step 1: Select a stock to edit its quantity."""
         config_entry = self.hass.config_entries.async_get_entry(self.config_entry_id)
@@ -260,21 +440,46 @@ class ISINSensorOptionsFlowHandler(config_entries.OptionsFlow):
             return await self.async_step_edit_quantity()
 
         if user_input is not None:
-            # Update the quantity for the selected ISIN
-            selected_sensor["quantity"] = round(user_input["quantity"], 2)  # Rundung auf 2 Nachkommastellen
-
-            # Update the config entry
+            # Update the quantity and the optional per-holding settings for the selected ISIN
+            updated_sensor = {
+                key: value for key, value in selected_sensor.items()
+                if key not in HOLDING_OVERRIDES
+            }
+            updated_sensor["quantity"] = round(user_input["quantity"], 2)  # Rundung auf 2 Nachkommastellen
+            for key in HOLDING_OVERRIDES:
+                if user_input.get(key) is not None:
+                    updated_sensor[key] = user_input[key]
+            sensors = [
+                updated_sensor if sensor["isin"] == self.selected_isin else sensor
+                for sensor in sensors
+            ]
+
+            # Update the config entry, the hub recomputes the total value without an API call
             self.hass.config_entries.async_update_entry(
                 config_entry,
                 data={**config_entry.data, "sensors": sensors},
+                options={**config_entry.options, "sensors": sensors},
             )
-            await self.hass.config_entries.async_reload(config_entry.entry_id)
             return self.async_create_entry(title="", data={})
 
         # Show the form to edit the quantity
         data_schema = vol.Schema(
             {
                 vol.Required("quantity", default=selected_sensor["quantity"]): cv.positive_float,  # Float-Validierung
+                # Leer lassen, um das Totband des Depots zu verwenden
+                vol.Optional(
+                    CONF_DEADBAND_ABSOLUTE,
+                    description={"suggested_value": selected_sensor.get(CONF_DEADBAND_ABSOLUTE)},
+                ): cv.positive_float,
+                vol.Optional(
+                    CONF_DEADBAND_PERCENT,
+                    description={"suggested_value": selected_sensor.get(CONF_DEADBAND_PERCENT)},
+                ): cv.positive_float,
+                # Leer lassen, um das Intervall der Instrumentart zu verwenden
+                vol.Optional(
+                    CONF_REFRESH_INTERVAL,
+                    description={"suggested_value": selected_sensor.get(CONF_REFRESH_INTERVAL)},
+                ): REFRESH_INTERVAL_VALIDATOR,
             }
         )
         return self.async_show_form(
@@ -285,6 +490,85 @@ class ISINSensorOptionsFlowHandler(config_entries.OptionsFlow):
             }
         )
 
+    async def async_step_alerts(self, user_input=None):
+        """Step 1: Select a stock to edit its price alerts."""
+        config_entry = self.hass.config_entries.async_get_entry(self.config_entry_id)
+        sensors = config_entry.data.get("sensors", [])
+        sensor_choices = {sensor["isin"]: sensor["name"] for sensor in sorted(sensors, key=lambda x: x["name"].lower())}
+
+        if user_input is not None:
+            self.selected_isin = user_input["isin"]
+            return await self.async_step_alerts_value()
+
+        data_schema = vol.Schema(
+            {
+                vol.Required("isin"): vol.In(sensor_choices),
+            }
+        )
+        return self.async_show_form(step_id="alerts", data_schema=data_schema)
+
+    async def async_step_alerts_value(self, user_input=None):
+        """Step 2: Edit the price alerts of the selected stock."""
+        config_entry = self.hass.config_entries.async_get_entry(self.config_entry_id)
+        sensors = config_entry.data.get("sensors", [])
+        selected_sensor = next(
+            (sensor for sensor in sensors if sensor["isin"] == self.selected_isin),
+            None
+        )
+        if not selected_sensor:
+            return await self.async_step_alerts()
+        alerts = selected_sensor.get(CONF_ALERTS, {})
+
+        if user_input is not None:
+            # Nur gesetzte Regeln speichern; ohne Regel entfällt der Eintrag
+            alerts = {
+                key: value for key, value in user_input.items()
+                if value is not None and value is not False and key != CONF_ALERT_HYSTERESIS
+            }
+            updated_sensor = {key: value for key, value in selected_sensor.items() if key != CONF_ALERTS}
+            if alerts:
+                alerts[CONF_ALERT_HYSTERESIS] = user_input[CONF_ALERT_HYSTERESIS]
+                updated_sensor[CONF_ALERTS] = alerts
+            sensors = [
+                updated_sensor if sensor["isin"] == self.selected_isin else sensor
+                for sensor in sensors
+            ]
+            self.hass.config_entries.async_update_entry(
+                config_entry,
+                data={**config_entry.data, "sensors": sensors},
+                options={**config_entry.options, "sensors": sensors},
+            )
+            return self.async_create_entry(title="", data={})
+
+        data_schema = vol.Schema(
+            {
+                # Leer lassen, um die Regel zu deaktivieren
+                vol.Optional(
+                    CONF_ALERT_ABOVE, description={"suggested_value": alerts.get(CONF_ALERT_ABOVE)}
+                ): cv.positive_float,
+                vol.Optional(
+                    CONF_ALERT_BELOW, description={"suggested_value": alerts.get(CONF_ALERT_BELOW)}
+                ): cv.positive_float,
+                vol.Optional(
+                    CONF_ALERT_52W_HIGH, default=alerts.get(CONF_ALERT_52W_HIGH, False)
+                ): bool,
+                vol.Optional(
+                    CONF_ALERT_52W_LOW, default=alerts.get(CONF_ALERT_52W_LOW, False)
+                ): bool,
+                vol.Optional(
+                    CONF_ALERT_HYSTERESIS,
+                    default=alerts.get(CONF_ALERT_HYSTERESIS, DEFAULT_ALERT_HYSTERESIS),
+                ): cv.positive_float,
+            }
+        )
+        return self.async_show_form(
+            step_id="alerts_value",
+            data_schema=data_schema,
+            description_placeholders={
+                "selected_stock": f"{selected_sensor['name']} (ISIN: {selected_sensor['isin']})"
+            }
+        )
+
     async def async_step_delete_sensor(self, user_input=None):
         """Delete an existing stock."""
         config_entry = self.hass.config_entries.async_get_entry(self.config_entry_id)
@@ -304,7 +588,7 @@ class ISINSensorOptionsFlowHandler(config_entries.OptionsFlow):
                 # Remove the sensor from the sensors list
                 sensors = [sensor for sensor in sensors if sensor["isin"] != user_input["isin"]]
 
-                # Update the config entry
+                # Update the config entry, the hub removes the entity live
                 self.hass.config_entries.async_update_entry(
                     config_entry,
                     data={**config_entry.data, "sensors": sensors},
@@ -312,29 +596,6 @@ class ISINSensorOptionsFlowHandler(config_entries.OptionsFlow):
                 )
                 _LOGGER.debug("Updated config entry: %s", config_entry.data)
 
-                # Remove the entity from the Entity Registry using unique_id
-                entity_registry = er.async_get(self.hass)
-                unique_id = selected_sensor["isin"].upper()  # ISIN in Großbuchstaben als unique_id
-                _LOGGER.debug("Generated unique_id for deletion: %s", unique_id)
-
-                # Find the entity by unique_id
-                entity_entry = next(
-                    (entry for entry in entity_registry.entities.values() if entry.unique_id == unique_id),
-                    None
-                )
-                if entity_entry:
-                    _LOGGER.debug("Entity found in registry with unique_id: %s", unique_id)
-
-                    # Remove the entity directly from the Entity Registry
-                    entity_registry.async_remove(entity_entry.entity_id)
-                    _LOGGER.debug("Entity removed from registry: %s", entity_entry.entity_id)
-                else:
-                    _LOGGER.warning("Entity not found in registry with unique_id: %s", unique_id)
-
-                # Reload the config entry to apply changes
-                await self.hass.config_entries.async_reload(config_entry.entry_id)
-                _LOGGER.debug("Config entry reloaded: %s", config_entry.entry_id)
-
                 return self.async_create_entry(title="", data={})
 
             # If the selected sensor is not found, show an error
@@ -362,4 +623,61 @@ class ISINSensorOptionsFlowHandler(config_entries.OptionsFlow):
             description_placeholders={
                 "selected_stock": "Wählen Sie eine Aktie aus der Liste aus."
             }
-        )
\ No newline at end of file
+        )
+
+    async def async_step_settings(self, user_input=None):
+        """Edit the settings of the hub."""
+        config_entry = self.hass.config_entries.async_get_entry(self.config_entry_id)
+        settings = dict(config_entry.data.get(CONF_SETTINGS, {}))
+
+        if user_input is not None:
+            settings.update(user_input)
+            if not user_input.get(CONF_BASE_CURRENCY):
+                settings.pop(CONF_BASE_CURRENCY, None)  # Leer: keine Umrechnung
+            self.hass.config_entries.async_update_entry(
+                config_entry,
+                data={**config_entry.data, CONF_SETTINGS: settings},
+            )
+            return self.async_create_entry(title="", data={})
+
+        data_schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_CHANGE_DETECTION, default=settings.get(CONF_CHANGE_DETECTION, False)
+                ): bool,
+                vol.Optional(
+                    CONF_DEADBAND_ABSOLUTE, default=settings.get(CONF_DEADBAND_ABSOLUTE, 0.0)
+                ): cv.positive_float,
+                vol.Optional(
+                    CONF_DEADBAND_PERCENT, default=settings.get(CONF_DEADBAND_PERCENT, 0.0)
+                ): cv.positive_float,
+                vol.Optional(
+                    CONF_HEARTBEAT, default=settings.get(CONF_HEARTBEAT, DEFAULT_HEARTBEAT)
+                ): cv.positive_int,
+                vol.Optional(
+                    CONF_DIAGNOSTIC_SENSORS, default=settings.get(CONF_DIAGNOSTIC_SENSORS, False)
+                ): bool,
+                # Abfrageintervall in Minuten je Instrumentart
+                **{
+                    vol.Optional(
+                        key, default=settings.get(key, DEFAULT_REFRESH_INTERVAL)
+                    ): REFRESH_INTERVAL_VALIDATOR
+                    for key in CONF_TYPE_INTERVALS.values()
+                },
+                # Anfragen je Stunde nach Positionswert verteilen; 0 = kein Budget
+                vol.Optional(
+                    CONF_REQUEST_BUDGET, default=settings.get(CONF_REQUEST_BUDGET, 0)
+                ): cv.positive_int,
+                vol.Optional(
+                    CONF_MAX_STALENESS, default=settings.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS)
+                ): REFRESH_INTERVAL_VALIDATOR,
+                vol.Optional(
+                    CONF_VOLATILITY_WEIGHTING, default=settings.get(CONF_VOLATILITY_WEIGHTING, False)
+                ): bool,
+                # ISO-Code, z. B. EUR; leer lassen, um nicht umzurechnen
+                vol.Optional(
+                    CONF_BASE_CURRENCY, description={"suggested_value": settings.get(CONF_BASE_CURRENCY)}
+                ): vol.All(cv.string, vol.Upper, vol.Match(r"^[A-Z]{3}$")),
+            }
+        )
+        return self.async_show_form(step_id="settings", data_schema=data_schema)
@@ -1,2 +1,93 @@
 """Constants for ISIN Sensor integration."""
+from datetime import timedelta
+
 DOMAIN = "mini-stock-pocket"
+
+SCAN_INTERVAL = timedelta(minutes=5)  # Abfrageintervall des Hub-Koordinators
+CLOSED_MARKET_INTERVAL = timedelta(hours=1)  # Heartbeat bei geschlossenem Handelsplatz
+SHARED_QUOTE_MAX_AGE = timedelta(minutes=4)  # Von einem anderen Hub abgefragte Kurse wiederverwenden
+MIN_REFRESH_INTERVAL = timedelta(minutes=1)  # Kürzestes einstellbares Abfrageintervall
+BUCKET_TOLERANCE = timedelta(seconds=30)  # Kurz vor Ablauf fällige ISINs im selben Zyklus mit abfragen
+PRICE_INFORMATION_INTERVAL = timedelta(minutes=30)  # Tages- und 52-Wochen-Spanne
+PRICE_INFORMATION_CACHE_SIZE = 1000
+VALIDATION_CACHE_SIZE = 500
+VALIDATION_TTL = timedelta(days=1)  # Bekannte ISIN
+VALIDATION_NEGATIVE_TTL = timedelta(minutes=10)  # Von der API abgelehnte ISIN
+
+# Circuit Breaker: Fehler in Folge bis zum Öffnen, Backoff verdoppelt sich bis zum Maximum
+CIRCUIT_BREAKER_THRESHOLD = 3
+API_BACKOFF_BASE = timedelta(minutes=1)  # Störung der ING API
+API_BACKOFF_MAX = timedelta(minutes=30)
+ISIN_BACKOFF_BASE = timedelta(minutes=10)  # Unbekannte oder nicht mehr gehandelte ISIN
+ISIN_BACKOFF_MAX = timedelta(hours=24)
+
+# Referenzkurse der EZB für die Basiswährung der Hubs
+FX_RATES_URL = "https://www.ecb.europa.eu/stats/eurofxref/eurofxref-daily.xml"
+FX_RATES_TTL = timedelta(hours=1)  # Die EZB veröffentlicht einmal täglich
+FX_RATES_RETRY = timedelta(minutes=5)
+
+API_BASE_URL = "https://component-api.wertpapiere.ing.de/api/v1/components"
+REQUEST_TIMEOUT = 10  # Sekunden
+
+# Gemeinsame HTTP-Session (configuration.yaml)
+CONF_CONNECTION_LIMIT = "connection_limit"
+CONF_DNS_CACHE_TTL = "dns_cache_ttl"
+DEFAULT_CONNECTION_LIMIT = 10
+DEFAULT_DNS_CACHE_TTL = 300  # Sekunden
+KEEPALIVE_TIMEOUT = 60  # Sekunden
+
+# Begrenzung der Anfragen an die ING API (configuration.yaml)
+CONF_MAX_CONCURRENT_REQUESTS = "max_concurrent_requests"
+CONF_REQUESTS_PER_SECOND = "requests_per_second"
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+CONF_FRESHNESS_WINDOW = "freshness_window"
+DEFAULT_FRESHNESS_WINDOW = 30  # Sekunden: so junge Kurse liefert der Dienst refresh ohne Abfrage
+
+# Hub-Einstellungen (Options Flow)
+CONF_SETTINGS = "settings"
+CONF_CHANGE_DETECTION = "change_detection"
+CONF_DEADBAND_ABSOLUTE = "deadband_absolute"
+CONF_DEADBAND_PERCENT = "deadband_percent"
+CONF_HEARTBEAT = "heartbeat_minutes"
+DEFAULT_HEARTBEAT = 60  # Minuten
+CONF_DIAGNOSTIC_SENSORS = "diagnostic_sensors"
+CONF_BASE_CURRENCY = "base_currency"
+# Abfrageintervall in Minuten je instrumentType.mainType, sonst SCAN_INTERVAL
+CONF_TYPE_INTERVALS = {
+    "Share": "interval_share",
+    "Fund": "interval_fund",
+    "Bond": "interval_bond",
+    "ExchangeRate": "interval_exchange_rate",
+}
+DEFAULT_REFRESH_INTERVAL = 5  # Minuten, entspricht SCAN_INTERVAL
+CONF_REFRESH_INTERVAL = "refresh_interval"  # Minuten, je Position
+CONF_REQUEST_BUDGET = "request_budget"  # Anfragen je Stunde, 0 = kein Budget
+CONF_MAX_STALENESS = "max_staleness"
+DEFAULT_MAX_STALENESS = 60  # Minuten
+CONF_VOLATILITY_WEIGHTING = "volatility_weighting"
+CONF_ALERTS = "alerts"  # Kursalarme je Position
+CONF_ALERT_ABOVE = "price_above"
+CONF_ALERT_BELOW = "price_below"
+CONF_ALERT_52W_HIGH = "fifty_two_week_high"
+CONF_ALERT_52W_LOW = "fifty_two_week_low"
+CONF_ALERT_HYSTERESIS = "alert_hysteresis"
+DEFAULT_ALERT_HYSTERESIS = 1.0  # Prozent
+# Einstellungen, nach deren Änderung der Abfrageplan sofort neu berechnet wird
+SCHEDULE_SETTINGS = (
+    *CONF_TYPE_INTERVALS.values(), CONF_REQUEST_BUDGET, CONF_MAX_STALENESS, CONF_VOLATILITY_WEIGHTING
+)
+
+DATA_CONFIG = f"{DOMAIN}_config"
+EVENT_PRICE_ALERT = f"{DOMAIN}_price_alert"
+DATA_SESSION = f"{DOMAIN}_session"
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+DATA_RESPONSE_CACHE = f"{DOMAIN}_response_cache"
+DATA_CLIENT = f"{DOMAIN}_client"
+DATA_FX_RATES = f"{DOMAIN}_fx_rates"
+DATA_QUOTE_REGISTRY = f"{DOMAIN}_quote_registry"
+
+# Persistenter Antwort-Cache für instrumentheader
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.instrumentheader"
+STORAGE_SAVE_DELAY = 60  # Sekunden
@@ -0,0 +1,293 @@
+"""Data update coordinator for the ISIN Sensor integration."""
+import asyncio
+import logging
+import math
+import time
+import zlib
+from datetime import timedelta
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+from .alerts import PriceAlerts
+from .api import async_get_client
+from .budget import allocate_intervals, guaranteed_rate
+from .const import (
+    BUCKET_TOLERANCE,
+    CONF_ALERTS,
+    CLOSED_MARKET_INTERVAL,
+    CONF_BASE_CURRENCY,
+    CONF_MAX_STALENESS,
+    CONF_REFRESH_INTERVAL,
+    CONF_REQUEST_BUDGET,
+    CONF_TYPE_INTERVALS,
+    CONF_VOLATILITY_WEIGHTING,
+    DEFAULT_MAX_STALENESS,
+    DOMAIN,
+    EVENT_PRICE_ALERT,
+    MIN_REFRESH_INTERVAL,
+    SCAN_INTERVAL,
+    SHARED_QUOTE_MAX_AGE,
+)
+from .fx import async_get_exchange_rates
+from .market_hours import is_market_open, next_market_open
+from .quote_registry import async_get_quote_registry
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ISINDataUpdateCoordinator(DataUpdateCoordinator):
+    """Fetch the quotes of all ISINs of a hub in one refresh cycle."""
+
+    def __init__(self, hass: HomeAssistant, hub):
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} {hub.hub_name}",
+            update_interval=SCAN_INTERVAL,
+        )
+        self.hub = hub
+        # Feste Phasenverschiebung je Hub (Anteil am Intervall), damit nicht alle Hubs gleichzeitig abfragen
+        self._phase = (zlib.crc32(hub.hub_name.encode()) % 1000) / 1000
+        self._client = async_get_client(hass)
+        self._exchange_rates = async_get_exchange_rates(hass)
+        # Abfragezeitpunkte, Kursverlauf und Status je ISIN teilen sich alle Hubs
+        self.registry = async_get_quote_registry(hass)
+        self._last_fetch = self.registry.fetched
+        self.last_cycle_duration = None  # Dauer des letzten Abfragezyklus in Sekunden
+        self.last_cycle_fetched = 0
+        self.intervals = {}  # ISIN -> Abfrageintervall des letzten Zyklus
+        self.alerts = PriceAlerts()
+
+    @property
+    def last_fetch(self):
+        """Return the time of the last successful fetch per ISIN of the hub."""
+        return {
+            isin: self._last_fetch[isin]
+            for isin in (sensor["isin"].upper() for sensor in self.hub.sensors)
+            if isin in self._last_fetch
+        }
+
+    @property
+    def stale(self):
+        """Return the ISINs whose last known quote could not be updated."""
+        return self.registry.stale
+
+    @property
+    def history(self):
+        """Return the price history per ISIN."""
+        return self.registry.history
+
+    def cached_quotes(self):
+        """Return the persisted quotes of the hub's ISINs for a warm start."""
+        quotes = {}
+        for sensor in self.hub.sensors:
+            isin = sensor["isin"].upper()
+            quote = self._client.cached_quote(isin)
+            if quote is not None:
+                quotes[isin] = quote
+        return quotes
+
+    def seed_validated(self, isins):
+        """Use the quotes fetched while validating new ISINs as their first state.
+
+        Returns the ISINs without a recent validation, which still have to be fetched. The seeded
+        ISINs are fetched with the next regular cycle, which also adds the price information.
+        """
+        data = dict(self.data or {})
+        now = dt_util.utcnow()
+        pending = []
+        for isin in isins:
+            validated = self._client.validated_quote(isin)
+            if validated is None or now - validated[0] >= SCAN_INTERVAL:
+                pending.append(isin)
+                continue
+            data[isin] = validated[1]
+        self.data = data
+        return pending
+
+    def _intervals(self, data, now):
+        """Return the refresh interval per ISIN: holding override, else instrument type setting, else SCAN_INTERVAL.
+
+        With a request budget, the budget is spread over the ISINs with an open market instead.
+        """
+        settings = self.hub.settings
+        intervals = {}
+        for sensor in self.hub.sensors:
+            isin = sensor["isin"].upper()
+            minutes = sensor.get(CONF_REFRESH_INTERVAL)
+            if minutes is None:
+                quote = data.get(isin)
+                key = CONF_TYPE_INTERVALS.get(quote.instrument_type) if quote is not None else None
+                minutes = settings.get(key) if key is not None else None
+            intervals[isin] = max(MIN_REFRESH_INTERVAL, timedelta(minutes=minutes)) if minutes else SCAN_INTERVAL
+        if settings.get(CONF_REQUEST_BUDGET):
+            intervals.update(self._budget_intervals(data, intervals, now))
+        return intervals
+
+    def _budget_intervals(self, data, intervals, now):
+        """Allocate the request budget by position value, and optionally by daily change, as intervals."""
+        settings = self.hub.settings
+        max_staleness = timedelta(minutes=settings.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS))
+        weights = {}
+        for sensor in self.hub.sensors:
+            isin = sensor["isin"].upper()
+            quote = data.get(isin)
+            if quote is None or not is_market_open(quote.get("stockMarket"), quote.instrument_type, now):
+                continue  # Geschlossene Handelsplätze laufen weiter im Heartbeat-Takt
+            weight = self._position_value(quote, sensor.get("quantity", 0))
+            if settings.get(CONF_VOLATILITY_WEIGHTING):
+                # Bewegte Positionen öfter abfragen: 2 % Tagesveränderung verdreifachen das Gewicht
+                weight *= 1 + abs(quote.get("changePercent") or 0)
+            weights[isin] = weights.get(isin, 0.0) + weight
+        if not weights:
+            return {}
+        budget = settings[CONF_REQUEST_BUDGET]
+        if budget < sum(guaranteed_rate(intervals[isin], max_staleness) for isin in weights):
+            _LOGGER.debug(
+                "Request budget of %s per hour for hub %s is below the guaranteed staleness of %s",
+                budget, self.hub.hub_name, max_staleness,
+            )
+        return allocate_intervals(weights, intervals, budget, max_staleness)
+
+    def _position_value(self, quote, quantity):
+        """Return the value of a position, in the base currency if one is set and the rate is known."""
+        if quote.price is None:
+            return 0.0
+        value = abs(quote.price * quantity)
+        base_currency = self.hub.settings.get(CONF_BASE_CURRENCY)
+        currency = quote.get("currency")
+        if base_currency and currency:
+            factor = self._exchange_rates.factor(currency, base_currency)
+            if factor is not None:
+                value *= factor
+        return value
+
+    def _aligned(self, earliest, interval):
+        """Return the first slot of the hub's phase grid for an interval at or after earliest."""
+        period = interval.total_seconds()
+        offset = self._phase * period
+        slot = math.ceil((earliest.timestamp() - offset) / period)
+        return dt_util.utc_from_timestamp(round(slot * period + offset))
+
+    def _next_due(self, isin, quote, interval, now):
+        """Return when an ISIN has to be fetched next."""
+        fetched = self._last_fetch.get(isin)
+        if quote is None or fetched is None:
+            return now
+        # Nächster Takt des Hubs frühestens nach einem halben Intervall, damit verspätete Zyklen keinen Takt überspringen
+        due = self._aligned(fetched + interval / 2, interval)
+        if is_market_open(quote.get("stockMarket"), quote.instrument_type, now):
+            return due
+        # Geschlossener Handelsplatz: im Heartbeat-Takt oder zur Eröffnung, aber nicht vor dem nächsten Takt des Hubs
+        closed_due = fetched + CLOSED_MARKET_INTERVAL
+        market_open = next_market_open(quote.get("stockMarket"), quote.instrument_type, now)
+        if market_open is not None:
+            closed_due = min(closed_due, market_open)
+        return max(due, closed_due)
+
+    def _is_due(self, isin, quote, interval, now):
+        """Check whether an ISIN has to be fetched in this cycle."""
+        return self._next_due(isin, quote, interval, now) - BUCKET_TOLERANCE <= now
+
+    def _next_update_interval(self, isins, data, intervals, now):
+        """Return the delay until the next bucket is due."""
+        next_due = None
+        for isin in isins:
+            if isin in self.stale:
+                # Fehlgeschlagen: erst im nächsten Takt des Intervalls erneut versuchen
+                due = self._aligned(now + intervals[isin] / 2, intervals[isin])
+            else:
+                due = self._next_due(isin, data.get(isin), intervals[isin], now)
+            if next_due is None or due < next_due:
+                next_due = due
+
+        if next_due is None:
+            return SCAN_INTERVAL
+        return max(MIN_REFRESH_INTERVAL, next_due - now)
+
+    async def _async_update_data(self):
+        """Fetch all due ISINs of the hub and return a dict keyed by ISIN."""
+        isins = list(dict.fromkeys(sensor["isin"].upper() for sensor in self.hub.sensors))
+        previous = self.data or {}
+        now = dt_util.utcnow()
+        intervals = self._intervals(previous, now)
+
+        # Fällige ISINs nach Intervall gruppieren; langsame Instrumente kosten nur in ihrem Takt Anfragen
+        buckets = {}
+        for isin in isins:
+            if self._is_due(isin, previous.get(isin), intervals[isin], now):
+                buckets.setdefault(intervals[isin], []).append(isin)
+        due = [isin for bucket in buckets.values() for isin in bucket]
+        _LOGGER.debug(
+            "Fetching %s of %s ISINs for hub %s in %s interval buckets",
+            len(due), len(isins), self.hub.hub_name, len(buckets),
+        )
+
+        # Bei Fehlern oder geschlossenem Markt den letzten bekannten Wert behalten
+        data = {isin: previous[isin] for isin in isins if isin in previous}
+        self.alerts.retain(isins)
+        started = time.monotonic()
+        fetches = [
+            # Von anderen Hubs abgefragte Kurse nur wiederverwenden, wenn sie jünger als das Intervall sind
+            self._async_fetch_into(data, bucket, min(SHARED_QUOTE_MAX_AGE, interval - BUCKET_TOLERANCE))
+            for interval, bucket in buckets.items()
+        ]
+        if self.hub.settings.get(CONF_BASE_CURRENCY):
+            # Wechselkurse parallel, die Abfrage teilen sich alle Hubs (TTL-Cache)
+            fetches.append(self._exchange_rates.async_refresh())
+        results = await asyncio.gather(*fetches)
+        failed = sum(results[:len(buckets)])
+        self.last_cycle_duration = time.monotonic() - started
+        self.last_cycle_fetched = len(due)
+
+        self.intervals = self._intervals(data, now)
+        self.update_interval = self._next_update_interval(isins, data, self.intervals, now)
+
+        # Letzte bekannte Kurse als veraltet markiert weiter anzeigen, statt die Entitäten abzuschalten
+        if due and failed == len(due) and not any(isin in data for isin in due):
+            raise UpdateFailed(f"Error fetching data for all ISINs of hub {self.hub.hub_name}")
+
+        return data
+
+    async def _async_fetch_into(self, data, isins, max_age=SHARED_QUOTE_MAX_AGE):
+        """Fetch the given ISINs through the shared registry into data and return the number of failures."""
+        quotes = await self.registry.async_fetch(isins, max_age)
+        self._check_alerts(data, quotes)
+        data.update(quotes)
+        return len(isins) - len(quotes)
+
+    def _check_alerts(self, previous, quotes):
+        """Fire an event for every alert rule crossed by a new quote."""
+        for sensor in self.hub.sensors:
+            isin = sensor["isin"].upper()
+            quote = quotes.get(isin)
+            if quote is None or quote is previous.get(isin):
+                continue  # Kein neuer Kurs
+            for rule, threshold in self.alerts.evaluate(isin, quote, sensor.get(CONF_ALERTS) or {}):
+                _LOGGER.debug("Price alert %s for ISIN %s at %s (threshold %s)", rule, isin, quote.price, threshold)
+                entity = self.hub.entities.get(isin)
+                self.hass.bus.async_fire(
+                    EVENT_PRICE_ALERT,
+                    {
+                        "hub_name": self.hub.hub_name,
+                        "isin": isin,
+                        "name": sensor.get("name"),
+                        "entity_id": entity.entity_id if entity is not None else None,
+                        "alert": rule,
+                        "threshold": threshold,
+                        "price": quote.price,
+                        "currency": quote.get("currency"),
+                    },
+                )
+
+    async def async_refresh_isins(self, isins, max_age=SHARED_QUOTE_MAX_AGE):
+        """Fetch only the given ISINs and push the merged data to the entities.
+
+        Quotes fetched within max_age, also by other hubs, are used without a request.
+        """
+        data = dict(self.data or {})
+        await self._async_fetch_into(data, isins, max_age)
+        # Nicht async_set_updated_data: das würde den Zeitplan des Hubs neu starten
+        self.data = data
+        self.async_update_listeners()
@@ -0,0 +1,45 @@
+"""Diagnostics support for the ISIN Sensor integration."""
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from .api import async_get_client
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry):
+    """Return diagnostics for a config entry."""
+    hub_name = entry.data["hub_name"]
+    hub = hass.data.get(DOMAIN, {}).get(hub_name)
+    client = async_get_client(hass)
+    diagnostics = {
+        "hub_name": hub_name,
+        "sensors": entry.data.get("sensors", []),
+        # Die API-Metriken gelten für alle Hubs gemeinsam
+        "api": client.metrics.as_dict(),
+        "api_circuit_breaker": client.breaker.as_dict(),
+    }
+    if hub is None:
+        return diagnostics
+
+    coordinator = hub.coordinator
+    diagnostics["settings"] = hub.settings
+    diagnostics["coordinator"] = {
+        "last_update_success": coordinator.last_update_success,
+        "update_interval_seconds": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+        "last_cycle_duration_seconds": coordinator.last_cycle_duration,
+        "last_cycle_fetched": coordinator.last_cycle_fetched,
+        "last_fetch": {isin: fetched.isoformat() for isin, fetched in coordinator.last_fetch.items()},
+        "refresh_interval_seconds": {
+            isin: interval.total_seconds() for isin, interval in coordinator.intervals.items()
+        },
+    }
+    diagnostics["stale"] = sorted(coordinator.stale.intersection(hub.isins))
+    diagnostics["shared_isins"] = {
+        isin: holders for isin in hub.isins if (holders := coordinator.registry.holders(isin)) > 1
+    }
+    diagnostics["isin_circuit_breakers"] = {
+        isin: breaker.as_dict()
+        for isin in hub.entities
+        if (breaker := client.isin_breaker(isin)) is not None
+    }
+    diagnostics["suppressed_writes"] = {isin: entity.suppressed_writes for isin, entity in hub.entities.items()}
+    return diagnostics
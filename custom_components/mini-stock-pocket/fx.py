@@ -0,0 +1,107 @@
+"""Integration-wide exchange rates for base currency valuation."""
+import aiohttp
+import asyncio
+import logging
+import time
+from xml.etree import ElementTree
+from homeassistant.core import HomeAssistant, callback
+from .const import DATA_FX_RATES, FX_RATES_RETRY, FX_RATES_TTL, FX_RATES_URL, REQUEST_TIMEOUT
+from .session import async_get_session
+
+_LOGGER = logging.getLogger(__name__)
+
+# Von der API gemeldete Währungssymbole -> (ISO-Code, Faktor)
+CURRENCY_ALIASES = {
+    "€": ("EUR", 1.0),
+    "$": ("USD", 1.0),
+    "£": ("GBP", 1.0),
+    "¥": ("JPY", 1.0),
+    "GBX": ("GBP", 0.01),  # Pence
+    "GBp": ("GBP", 0.01),
+}
+
+
+def normalize_currency(currency):
+    """Return the ISO code and scale of a reported currency."""
+    alias = CURRENCY_ALIASES.get(currency)
+    if alias is not None:
+        return alias
+    return currency.upper(), 1.0
+
+
+class ExchangeRates:
+    """ECB reference rates, fetched at most once per TTL for all hubs."""
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize without rates."""
+        self._hass = hass
+        self._rates = {"EUR": 1.0}  # Währung -> Kurs je Euro
+        self._expires = 0.0
+        self._lock = asyncio.Lock()
+        self.updated = None  # Zeitpunkt der letzten erfolgreichen Abfrage
+
+    def factor(self, source, target):
+        """Return the factor converting an amount from source to target currency, or None if unknown."""
+        source, scale = normalize_currency(source)
+        if source == target:
+            return scale
+        source_rate = self._rates.get(source)
+        target_rate = self._rates.get(target)
+        if not source_rate or not target_rate:
+            return None
+        return scale * target_rate / source_rate
+
+    async def async_refresh(self):
+        """Fetch the rates unless the cached ones are still valid."""
+        if time.monotonic() < self._expires:
+            return
+        async with self._lock:
+            # Andere Hubs warten auf die laufende Abfrage, statt selbst anzufragen
+            if time.monotonic() < self._expires:
+                return
+            rates = await self._async_fetch()
+            if rates is None:
+                # Alte Kurse weiterverwenden und erst später erneut versuchen
+                self._expires = time.monotonic() + FX_RATES_RETRY.total_seconds()
+                return
+            self._rates = {"EUR": 1.0, **rates}
+            self._expires = time.monotonic() + FX_RATES_TTL.total_seconds()
+            self.updated = time.time()
+
+    async def _async_fetch(self):
+        """Fetch and parse the daily ECB reference rates."""
+        session = async_get_session(self._hass)
+        try:
+            async with session.get(FX_RATES_URL, timeout=REQUEST_TIMEOUT) as response:
+                if response.status != 200:
+                    _LOGGER.warning("Non-200 response for exchange rates: %s", response.status)
+                    return None
+                text = await response.text()
+        except aiohttp.ClientError as e:
+            _LOGGER.error("Error fetching exchange rates: %s", e)
+            return None
+        except asyncio.TimeoutError:
+            _LOGGER.error("Timeout fetching exchange rates")
+            return None
+
+        try:
+            root = ElementTree.fromstring(text)
+        except ElementTree.ParseError as e:
+            _LOGGER.error("Invalid exchange rate response: %s", e)
+            return None
+        rates = {
+            element.get("currency"): float(element.get("rate"))
+            for element in root.iter()
+            if element.get("currency") and element.get("rate")
+        }
+        _LOGGER.debug("Fetched %s exchange rates", len(rates))
+        return rates
+
+
+@callback
+def async_get_exchange_rates(hass: HomeAssistant) -> ExchangeRates:
+    """Return the integration-wide exchange rates."""
+    rates = hass.data.get(DATA_FX_RATES)
+    if rates is None:
+        rates = hass.data[DATA_FX_RATES] = ExchangeRates(hass)
+    return rates
@@ -0,0 +1,90 @@
+"""Fixed-size in-memory price history per ISIN."""
+import math
+from array import array
+from itertools import accumulate
+
+HISTORY_SIZE = 288  # Kurse: 24 Stunden im 5-Minuten-Takt, 2 x 8 Byte je Eintrag
+
+
+class PriceHistory:
+    """Ring buffer of (timestamp, price) samples backed by two preallocated double arrays."""
+
+    __slots__ = ("_times", "_prices", "_start", "_count", "_statistics")
+
+    def __init__(self, size=HISTORY_SIZE):
+        """Initialize an empty buffer, the memory is allocated once."""
+        self._times = array("d", bytes(8 * size))
+        self._prices = array("d", bytes(8 * size))
+        self._start = 0
+        self._count = 0
+        self._statistics = {}  # Zwischenspeicher je Zeitfenster, wird beim Einfügen verworfen
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, price):
+        """Add a sample, overwriting the oldest one when the buffer is full."""
+        size = len(self._prices)
+        if self._count < size:
+            i = (self._start + self._count) % size
+            self._count += 1
+        else:
+            i = self._start
+            self._start = (self._start + 1) % size
+        self._times[i] = timestamp
+        self._prices[i] = price
+        self._statistics.clear()
+
+    def _ordered(self, buffer):
+        """Return the samples of a buffer from oldest to newest as a contiguous array."""
+        end = self._start + self._count
+        if end <= len(buffer):
+            return buffer[self._start:end]
+        return buffer[self._start:] + buffer[:end - len(buffer)]
+
+    def samples(self, since=None):
+        """Return the timestamps and prices from oldest to newest, optionally only since a timestamp."""
+        times = self._ordered(self._times)
+        prices = self._ordered(self._prices)
+        if since is not None:
+            first = next((i for i, timestamp in enumerate(times) if timestamp >= since), len(times))
+            times, prices = times[first:], prices[first:]
+        return times, prices
+
+    def statistics(self, since=None):
+        """Return low, high, simple moving average, volatility and drawdown of the samples.
+
+        The volatility is the standard deviation of the returns between samples in percent,
+        the drawdown the largest drop from a running high in percent.
+        """
+        statistics = self._statistics.get(since)
+        if statistics is not None:
+            return statistics
+
+        _, prices = self.samples(since)
+        count = len(prices)
+        if not count:
+            return {"samples": 0}
+
+        # Ganze Arrays mit den C-Builtins verarbeiten statt Element für Element in Python
+        mean = math.fsum(prices) / count
+        returns = [current / previous - 1 for previous, current in zip(prices, prices[1:]) if previous]
+        volatility = None
+        if len(returns) > 1:
+            mean_return = math.fsum(returns) / len(returns)
+            variance = math.fsum((value - mean_return) ** 2 for value in returns) / (len(returns) - 1)
+            volatility = math.sqrt(variance) * 100
+        drawdown = max(
+            (1 - price / high for high, price in zip(accumulate(prices, max), prices) if high),
+            default=0.0,
+        ) * 100
+
+        statistics = self._statistics[since] = {
+            "samples": count,
+            "low": min(prices),
+            "high": max(prices),
+            "sma": mean,
+            "volatility": volatility,
+            "drawdown": drawdown,
+        }
+        return statistics
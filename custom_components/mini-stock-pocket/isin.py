@@ -0,0 +1,21 @@
+"""Offline ISIN structure and check digit validation."""
+import re
+
+_ISIN_PATTERN = re.compile(r"[A-Z]{2}[A-Z0-9]{9}[0-9]")
+
+
+def is_valid_isin_format(isin):
+    """Check the structure and the Luhn check digit of an ISIN without any network call."""
+    if not _ISIN_PATTERN.fullmatch(isin):
+        return False
+    # Buchstaben als Zahlen 10-35 ausschreiben, dann Luhn über alle Ziffern
+    digits = "".join(str(int(char, 36)) for char in isin)
+    total = 0
+    for i, char in enumerate(reversed(digits)):
+        n = int(char)
+        if i % 2:
+            n *= 2
+            if n > 9:
+                n -= 9
+        total += n
+    return total % 10 == 0
@@ -0,0 +1,119 @@
+"""Trading calendar for the venues reported by the ING API."""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
+
+
+class TradingVenue(NamedTuple):
+    """Session hours of a trading venue."""
+
+    timezone: str
+    open: time
+    close: time
+    holidays: str
+
+
+# Teilstrings des "stockMarket"-Feldes -> Handelszeiten (Mo-Fr)
+VENUES = (
+    ("xetra", TradingVenue("Europe/Berlin", time(9, 0), time(17, 30), "de")),
+    ("tradegate", TradingVenue("Europe/Berlin", time(8, 0), time(22, 0), "de")),
+    ("gettex", TradingVenue("Europe/Berlin", time(8, 0), time(22, 0), "de")),
+    ("lang & schwarz", TradingVenue("Europe/Berlin", time(7, 30), time(23, 0), "de")),
+    ("ls exchange", TradingVenue("Europe/Berlin", time(7, 30), time(23, 0), "de")),
+    ("direkthandel", TradingVenue("Europe/Berlin", time(7, 30), time(23, 0), "de")),
+    ("frankfurt", TradingVenue("Europe/Berlin", time(8, 0), time(22, 0), "de")),
+    ("stuttgart", TradingVenue("Europe/Berlin", time(8, 0), time(22, 0), "de")),
+    ("münchen", TradingVenue("Europe/Berlin", time(8, 0), time(22, 0), "de")),
+    ("düsseldorf", TradingVenue("Europe/Berlin", time(8, 0), time(22, 0), "de")),
+    ("quotrix", TradingVenue("Europe/Berlin", time(8, 0), time(22, 0), "de")),
+    ("hamburg", TradingVenue("Europe/Berlin", time(8, 0), time(22, 0), "de")),
+    ("berlin", TradingVenue("Europe/Berlin", time(8, 0), time(22, 0), "de")),
+    ("nasdaq", TradingVenue("America/New_York", time(9, 30), time(16, 0), "us")),
+    ("nyse", TradingVenue("America/New_York", time(9, 30), time(16, 0), "us")),
+    ("new york", TradingVenue("America/New_York", time(9, 30), time(16, 0), "us")),
+    ("london", TradingVenue("Europe/London", time(8, 0), time(16, 30), "uk")),
+)
+
+# Instrumenttypen, die rund um die Uhr gehandelt werden
+ALWAYS_OPEN_TYPES = ("ExchangeRate",)
+
+
+def _easter(year):
+    """Return Easter Sunday of the given year (Gauss/Anonymous algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+@lru_cache(maxsize=16)
+def _holidays(calendar, year):
+    """Return the exchange holidays of a calendar for a year."""
+    easter = _easter(year)
+    good_friday = easter - timedelta(days=2)
+    easter_monday = easter + timedelta(days=1)
+    if calendar == "de":
+        return frozenset({
+            date(year, 1, 1), good_friday, easter_monday, date(year, 5, 1),
+            date(year, 12, 24), date(year, 12, 25), date(year, 12, 26), date(year, 12, 31),
+        })
+    if calendar == "uk":
+        return frozenset({date(year, 1, 1), good_friday, easter_monday, date(year, 12, 25), date(year, 12, 26)})
+    if calendar == "us":
+        return frozenset({date(year, 1, 1), good_friday, date(year, 7, 4), date(year, 12, 25)})
+    return frozenset()
+
+
+@lru_cache(maxsize=64)
+def get_venue(stock_market):
+    """Return the trading venue for a stockMarket value, or None if unknown."""
+    if not stock_market:
+        return None
+    stock_market = stock_market.lower()
+    return next((venue for key, venue in VENUES if key in stock_market), None)
+
+
+def _is_trading_day(venue, day):
+    """Check whether the venue trades on the given local date."""
+    return day.weekday() < 5 and day not in _holidays(venue.holidays, day.year)
+
+
+def is_market_open(stock_market, instrument_type, now):
+    """Check whether quotes of an instrument can change at the given time.
+
+    Unknown venues are treated as always open so they keep the normal polling rate.
+    """
+    if instrument_type in ALWAYS_OPEN_TYPES:
+        return True
+    venue = get_venue(stock_market)
+    if venue is None:
+        return True
+    local = now.astimezone(ZoneInfo(venue.timezone))
+    return _is_trading_day(venue, local.date()) and venue.open <= local.time() < venue.close
+
+
+def next_market_open(stock_market, instrument_type, now):
+    """Return the next session start after now, or None if the market is always open."""
+    if instrument_type in ALWAYS_OPEN_TYPES:
+        return None
+    venue = get_venue(stock_market)
+    if venue is None:
+        return None
+    tz = ZoneInfo(venue.timezone)
+    local = now.astimezone(tz)
+    for offset in range(15):
+        day = local.date() + timedelta(days=offset)
+        if not _is_trading_day(venue, day):
+            continue
+        start = datetime.combine(day, venue.open, tzinfo=tz)
+        if start > local:
+            return start
+    return None
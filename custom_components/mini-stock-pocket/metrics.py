@@ -0,0 +1,120 @@
+"""Lightweight hot-path metrics for the ISIN Sensor integration."""
+import time
+from collections import Counter, deque
+
+LATENCY_SAMPLES = 512  # Letzte Messwerte je Endpunkt für die Perzentile
+
+
+def _percentile_ms(sorted_values, percent):
+    """Return a percentile of pre-sorted latencies in milliseconds (nearest rank)."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(percent / 100 * len(sorted_values)) - 1))
+    return round(sorted_values[index] * 1000, 1)
+
+
+class EndpointMetrics:
+    """Counters and recent latencies of one API endpoint."""
+
+    __slots__ = ("latencies", "statuses", "timeouts", "errors")
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.statuses = Counter()
+        self.timeouts = 0
+        self.errors = 0
+
+    @property
+    def requests(self):
+        """Return the number of answered and failed requests."""
+        return sum(self.statuses.values()) + self.timeouts + self.errors
+
+    def as_dict(self):
+        """Return the metrics, percentiles are only computed here."""
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "status_codes": dict(self.statuses),
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "latency_ms": {f"p{percent}": _percentile_ms(latencies, percent) for percent in (50, 90, 99)},
+        }
+
+
+class ApiMetrics:
+    """Integration-wide request and cache metrics."""
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self.endpoints = {}
+        self.cache_hits = Counter()
+        self.cache_misses = Counter()
+
+    def _endpoint(self, endpoint):
+        """Return the metrics of an endpoint."""
+        metrics = self.endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self.endpoints[endpoint] = EndpointMetrics()
+        return metrics
+
+    @staticmethod
+    def start():
+        """Return a start timestamp for a request."""
+        return time.monotonic()
+
+    def record_response(self, endpoint, status, started):
+        """Record an answered request."""
+        metrics = self._endpoint(endpoint)
+        metrics.statuses[status] += 1
+        metrics.latencies.append(time.monotonic() - started)
+
+    def record_timeout(self, endpoint):
+        """Record a timed out request."""
+        self._endpoint(endpoint).timeouts += 1
+
+    def record_error(self, endpoint):
+        """Record a request that failed without a response."""
+        self._endpoint(endpoint).errors += 1
+
+    def record_cache(self, cache, hit):
+        """Record a cache lookup."""
+        if hit:
+            self.cache_hits[cache] += 1
+        else:
+            self.cache_misses[cache] += 1
+
+    @property
+    def requests(self):
+        """Return the total number of requests."""
+        return sum(metrics.requests for metrics in self.endpoints.values())
+
+    @property
+    def failures(self):
+        """Return the number of non-200/304 responses, timeouts and errors."""
+        return sum(
+            metrics.timeouts + metrics.errors
+            + sum(count for status, count in metrics.statuses.items() if status not in (200, 304))
+            for metrics in self.endpoints.values()
+        )
+
+    def hit_ratio(self, cache=None):
+        """Return the hit ratio of one or all caches in percent."""
+        caches = [cache] if cache else set(self.cache_hits) | set(self.cache_misses)
+        hits = sum(self.cache_hits[name] for name in caches)
+        total = hits + sum(self.cache_misses[name] for name in caches)
+        return round(hits / total * 100, 1) if total else None
+
+    def as_dict(self):
+        """Return all metrics for diagnostics."""
+        return {
+            "endpoints": {name: metrics.as_dict() for name, metrics in self.endpoints.items()},
+            "caches": {
+                name: {
+                    "hits": self.cache_hits[name],
+                    "misses": self.cache_misses[name],
+                    "hit_ratio": self.hit_ratio(name),
+                }
+                for name in sorted(set(self.cache_hits) | set(self.cache_misses))
+            },
+        }
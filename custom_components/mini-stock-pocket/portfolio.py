@@ -0,0 +1,107 @@
+"""Portfolio aggregates for an ISIN hub."""
+
+
+class PortfolioTotals:
+    """Keep hub totals up to date by only re-summing changed positions."""
+
+    def __init__(self, exchange_rates=None, base_currency=None):
+        """Initialize empty totals."""
+        self._positions = {}  # ISIN -> (quote, quantity, value, change, currency)
+        self._by_currency = {}  # Währung -> [Wert, Veränderung, Anzahl Positionen]
+        self.positions = 0
+        self.exchange_rates = exchange_rates
+        self.base_currency = base_currency
+
+    def _sum(self, index):
+        """Sum a value over all currencies, converted into the base currency if one is set."""
+        if not self.base_currency:
+            return sum((values[index] for values in self._by_currency.values()), 0.0)
+        total = 0.0
+        for currency, values in self._by_currency.items():
+            if currency is None or not values[index]:
+                total += values[index]  # Ohne Währung: als Basiswährung behandeln
+                continue
+            factor = self.exchange_rates.factor(currency, self.base_currency)
+            if factor is None:
+                return None  # Kein Kurs für diese Währung
+            total += values[index] * factor
+        return total
+
+    @property
+    def total_value(self):
+        """Return the value of all positions."""
+        return self._sum(0)
+
+    @property
+    def change_absolute(self):
+        """Return the daily change of all positions."""
+        return self._sum(1)
+
+    @property
+    def change_percent(self):
+        """Return the daily change relative to the previous day's value."""
+        total_value = self.total_value
+        change_absolute = self.change_absolute
+        if total_value is None or change_absolute is None:
+            return None
+        previous_value = total_value - change_absolute
+        if not previous_value:
+            return None
+        return change_absolute / previous_value * 100
+
+    @property
+    def currency(self):
+        """Return the base currency, or the common currency of all positions, or None if mixed."""
+        if self.base_currency:
+            return self.base_currency
+        currencies = [currency for currency in self._by_currency if currency is not None]
+        if len(currencies) == 1:
+            return currencies[0]
+        return None
+
+    def update(self, sensors, data):
+        """Apply changed quotes and quantities to the totals."""
+        seen = set()
+        for sensor in sensors:
+            isin = sensor["isin"].upper()
+            seen.add(isin)
+            quote = data.get(isin)
+            quantity = sensor.get("quantity", 0)
+            entry = self._positions.get(isin)
+            if entry is not None and entry[0] is quote and entry[1] == quantity:
+                continue  # Unverändert
+            if entry is not None:
+                self._remove(entry)
+            self._add(isin, quote, quantity)
+
+        for isin in self._positions.keys() - seen:
+            self._remove(self._positions.pop(isin))
+        self.positions = len(self._positions)
+
+    def _add(self, isin, quote, quantity):
+        """Add the contribution of a position."""
+        value = change = 0.0
+        currency = None
+        if quote is not None and quote.price is not None:
+            value = quote.price * quantity
+            change = (quote.get("changeAbsolute") or 0) * quantity
+            currency = quote.get("currency")
+        self._positions[isin] = (quote, quantity, value, change, currency)
+        values = self._by_currency.get(currency)
+        if values is None:
+            values = self._by_currency[currency] = [0.0, 0.0, 0]
+        values[0] += value
+        values[1] += change
+        values[2] += 1
+
+    def _remove(self, entry):
+        """Remove the contribution of a position."""
+        _, _, value, change, currency = entry
+        values = self._by_currency[currency]
+        values[2] -= 1
+        if not values[2]:
+            # Rundungsfehler der inkrementellen Summen verwerfen
+            del self._by_currency[currency]
+            return
+        values[0] -= value
+        values[1] -= change
@@ -0,0 +1,158 @@
+"""Table-driven quote records for the ISIN Sensor integration."""
+from typing import NamedTuple
+
+
+class QuoteSchema:
+    """Attribute names and API source keys of one instrument type."""
+
+    __slots__ = ("names", "sources", "index", "extended")
+
+    def __init__(self, fields, extra_fields=()):
+        """Initialize the schema from (attribute, source key) pairs."""
+        self.names = tuple(name for name, _ in fields)
+        self.sources = tuple(source for _, source in fields)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        # Variante mit den Feldern der priceinformation-Antwort
+        self.extended = QuoteSchema(fields + extra_fields) if extra_fields else None
+
+
+# Felder der priceinformation-Antwort: (Attributname, id in "data")
+PRICE_INFORMATION_FIELDS = (
+    ("dailyLow", "DailyLow"),
+    ("dailyHigh", "DailyHigh"),
+    ("fiftyTwoWeekLow", "FiftyTwoWeekLow"),
+    ("fiftyTwoWeekHigh", "FiftyTwoWeekHigh"),
+)
+
+_IDENTIFIERS = (
+    ("wkn", "wkn"),
+    ("isin", "isin"),
+    ("internalIsin", "internalIsin"),
+    ("stockMarket", "stockMarket"),
+    ("priceChangeDate", "priceChangeDate"),
+)
+
+# Attribute je instrumentType.mainType: (Attributname, Schlüssel in der API-Antwort)
+ATTRIBUTE_SCHEMA = {
+    "Share": QuoteSchema((  # Aktie
+        ("name", "name"),
+        ("instrumentTypeDisplayName", "instrumentTypeDisplayName"),
+        ("close", "close"),
+        ("changePercent", "changePercent"),
+        ("changeAbsolute", "changeAbsolute"),
+        ("bid", "bid"),
+        ("bidDate", "bidDate"),
+        ("ask", "ask"),
+        ("askDate", "askDate"),
+        *_IDENTIFIERS,
+        ("currency", "currency"),
+        ("currencySign", "currencySign"),
+    ), PRICE_INFORMATION_FIELDS),
+    "Fund": QuoteSchema((  # Fonds & ETF
+        ("name", "name"),
+        ("instrumentTypeDisplayName", "instrumentTypeDisplayName"),
+        ("close", "close"),
+        ("changePercent", "changePercent"),
+        ("changeAbsolute", "changeAbsolute"),
+        *_IDENTIFIERS,
+        ("currency", "currency"),
+        ("currencySign", "currencySign"),
+    )),
+    "Bond": QuoteSchema((  # Anleihe
+        ("name", "name"),
+        ("instrumentTypeDisplayName", "instrumentTypeDisplayName"),
+        ("bid", "bid"),
+        ("bidDate", "bidDate"),
+        ("ask", "ask"),
+        ("askDate", "askDate"),
+        *_IDENTIFIERS,
+        ("currency", "currency"),
+        ("currencySign", "currencySign"),
+    ), PRICE_INFORMATION_FIELDS),
+    "ExchangeRate": QuoteSchema((  # Krypto
+        ("name", "name"),
+        ("instrumentTypeDisplayName", "instrumentTypeDisplayName"),
+        ("bidDate", "bidDate"),
+        ("askDate", "askDate"),
+        *_IDENTIFIERS,
+        ("currency", "currencySign"),
+        ("currencySign", "currencySign"),
+    )),
+}
+
+# Standardfall oder unbekannter Typ
+DEFAULT_SCHEMA = QuoteSchema((
+    ("name", "name"),
+    *_IDENTIFIERS,
+    ("currency", "currency"),
+    ("currencySign", "currencySign"),
+))
+
+_PRICE_INFORMATION_IDS = {source: i for i, (_, source) in enumerate(PRICE_INFORMATION_FIELDS)}
+
+
+class PriceInformation(NamedTuple):
+    """Parsed priceinformation response, in PRICE_INFORMATION_FIELDS order."""
+
+    daily_low: float | None
+    daily_high: float | None
+    fifty_two_week_low: float | None
+    fifty_two_week_high: float | None
+
+
+def parse_price_information(price_data):
+    """Extract the price information values in a single pass over the data list."""
+    values = [None] * len(PRICE_INFORMATION_FIELDS)
+    for item in price_data.get("data", []):
+        i = _PRICE_INFORMATION_IDS.get(item.get("id"))
+        if i is not None and values[i] is None:
+            values[i] = (item.get("fieldValue") or {}).get("value")  # Fehlende Werte bleiben None
+    return PriceInformation(*values)
+
+
+class Quote:
+    """Compact, immutable record of a parsed instrumentheader response."""
+
+    __slots__ = ("price", "instrument_type", "schema", "values")
+
+    def __init__(self, price, instrument_type, schema, values):
+        """Initialize the quote."""
+        self.price = price
+        self.instrument_type = instrument_type
+        self.schema = schema
+        self.values = values
+
+    @classmethod
+    def from_instrumentheader(cls, data):
+        """Create a quote from an instrumentheader response."""
+        instrument_type = data.get("instrumentType", {}).get("mainType")
+        schema = ATTRIBUTE_SCHEMA.get(instrument_type, DEFAULT_SCHEMA)
+        return cls(data.get("price"), instrument_type, schema, tuple(data.get(source) for source in schema.sources))
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a quote from its stored representation."""
+        attributes = data.get("attributes", {})
+        schema = ATTRIBUTE_SCHEMA.get(data.get("instrument_type"), DEFAULT_SCHEMA)
+        if schema.extended is not None and PRICE_INFORMATION_FIELDS[0][0] in attributes:
+            schema = schema.extended
+        return cls(data.get("price"), data.get("instrument_type"), schema, tuple(attributes.get(name) for name in schema.names))
+
+    def with_price_information(self, price_information):
+        """Return a copy with the given priceinformation values."""
+        schema = self.schema.extended or self.schema
+        base = len(schema.names) - len(price_information)
+        return Quote(self.price, self.instrument_type, schema, self.values[:base] + price_information)
+
+    def get(self, name, default=None):
+        """Return a single attribute without building the attribute dict."""
+        i = self.schema.index.get(name)
+        return default if i is None else self.values[i]
+
+    def attributes(self):
+        """Build the attribute dict, only needed when the state is written."""
+        return dict(zip(self.schema.names, self.values))
+
+    def as_dict(self):
+        """Return the stored representation of the quote."""
+        return {"price": self.price, "instrument_type": self.instrument_type, "attributes": self.attributes()}
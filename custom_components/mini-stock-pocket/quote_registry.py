@@ -0,0 +1,143 @@
+"""Integration-wide quote registry shared by all hubs."""
+import asyncio
+import logging
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+from .api import async_get_client
+from .const import DATA_QUOTE_REGISTRY, DOMAIN
+from .history import PriceHistory
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class QuoteRegistry:
+    """Quotes keyed by ISIN, fetched once no matter how many hubs hold an instrument.
+
+    Hubs register their ISINs; the per-ISIN state is dropped once no hub holds an ISIN anymore.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize an empty registry."""
+        self._hass = hass
+        self._client = async_get_client(hass)
+        self._holders = {}  # ISIN -> Namen der Hubs mit dieser Position (Referenzzähler)
+        self._pending = {}  # ISIN -> Future der laufenden Abfrage
+        self.quotes = {}  # ISIN -> zuletzt erfolgreich abgefragte Quote
+        self.fetched = {}  # ISIN -> Zeitpunkt der letzten erfolgreichen Abfrage
+        self.history = {}  # ISIN -> PriceHistory
+        self.stale = set()  # ISINs, deren letzter Kurs nicht aktualisiert werden konnte
+
+    def __len__(self):
+        return len(self._holders)
+
+    def holders(self, isin):
+        """Return the number of hubs holding an ISIN."""
+        return len(self._holders.get(isin, ()))
+
+    @callback
+    def register(self, hub_name, isins):
+        """Set the ISINs held by a hub and release the ones it no longer holds."""
+        isins = set(isins)
+        for isin in isins:
+            self._holders.setdefault(isin, set()).add(hub_name)
+        released = [isin for isin, hubs in self._holders.items() if hub_name in hubs and isin not in isins]
+        unheld = False
+        for isin in released:
+            hubs = self._holders[isin]
+            hubs.discard(hub_name)
+            if not hubs:
+                del self._holders[isin]
+                self.quotes.pop(isin, None)
+                self.fetched.pop(isin, None)
+                self.history.pop(isin, None)
+                self.stale.discard(isin)
+                unheld = True
+        if unheld:
+            self.async_prune()
+
+    @callback
+    def unregister(self, hub_name):
+        """Release all ISINs of a hub."""
+        self.register(hub_name, ())
+
+    @callback
+    def async_prune(self, exclude_entry_id=None):
+        """Drop the persisted responses of ISINs that no config entry holds anymore.
+
+        The config entries decide instead of the registered hubs, so that reloading an
+        entry keeps its cached quotes for the restore on setup.
+        """
+        keep = {
+            sensor["isin"].upper()
+            for entry in self._hass.config_entries.async_entries(DOMAIN)
+            if entry.entry_id != exclude_entry_id
+            for sensor in entry.options.get("sensors", entry.data.get("sensors", []))
+        }
+        self._client.async_prune(keep)
+
+    async def async_fetch(self, isins, max_age):
+        """Return the quotes of the ISINs that were fetched successfully within max_age.
+
+        ISINs fetched recently by another hub are reused, ISINs currently being fetched for
+        another hub are awaited instead of requested a second time.
+        """
+        now = dt_util.utcnow()
+        loop = asyncio.get_running_loop()
+        to_fetch = []
+        waiting = []
+        for isin in isins:
+            fetched = self.fetched.get(isin)
+            if fetched is not None and now - fetched < max_age:
+                continue
+            future = self._pending.get(isin)
+            if future is None:
+                future = self._pending[isin] = loop.create_future()
+                to_fetch.append(isin)
+            else:
+                waiting.append(future)
+
+        if to_fetch:
+            _LOGGER.debug("Fetching %s ISINs, %s shared with other hubs", len(to_fetch), len(isins) - len(to_fetch))
+            results = {}
+            try:
+                results = await self._client.async_fetch_many(to_fetch)
+            finally:
+                fetched = dt_util.utcnow()
+                for isin in to_fetch:
+                    self._apply(isin, results.get(isin), fetched)
+                    self._pending.pop(isin).set_result(None)
+        if waiting:
+            await asyncio.gather(*waiting)
+
+        return {
+            isin: self.quotes[isin]
+            for isin in isins
+            if isin in self.fetched and now - self.fetched[isin] < max_age
+        }
+
+    def _apply(self, isin, result, fetched):
+        """Store the result of a fetch."""
+        if isin not in self._holders:
+            return  # Inzwischen von allen Hubs entfernt
+        if result is None or result.quote is None:
+            # Übersprungen (Circuit Breaker offen) oder fehlgeschlagen
+            self.stale.add(isin)
+            return
+        quote = result.quote
+        self.quotes[isin] = quote
+        self.fetched[isin] = fetched
+        self.stale.discard(isin)
+        if quote.price is not None:
+            history = self.history.get(isin)
+            if history is None:
+                history = self.history[isin] = PriceHistory()
+            history.append(fetched.timestamp(), quote.price)
+
+
+@callback
+def async_get_quote_registry(hass: HomeAssistant) -> QuoteRegistry:
+    """Return the integration-wide quote registry."""
+    registry = hass.data.get(DATA_QUOTE_REGISTRY)
+    if registry is None:
+        registry = hass.data[DATA_QUOTE_REGISTRY] = QuoteRegistry(hass)
+    return registry
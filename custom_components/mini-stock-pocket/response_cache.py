@@ -0,0 +1,90 @@
+"""Persistent instrumentheader response cache with HTTP validators."""
+import logging
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from .const import DATA_RESPONSE_CACHE, STORAGE_KEY, STORAGE_SAVE_DELAY, STORAGE_VERSION
+from .quote import Quote
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Cache the last quote and its ETag/Last-Modified validators per ISIN."""
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the cache."""
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._entries = {}  # ISIN -> {"etag", "last_modified", "quote"}
+        self.load_task = None  # Einmaliges Laden, auf das alle Aufrufer warten
+
+    async def async_load(self):
+        """Load the cached responses from storage."""
+        stored = await self._store.async_load()
+        if stored:
+            # Während des Ladens gespeicherte Antworten sind neuer als die gespeicherten
+            self._entries = {
+                **{
+                    isin: {**entry, "quote": Quote.from_dict(entry["quote"])}
+                    for isin, entry in stored.get("entries", {}).items()
+                },
+                **self._entries,
+            }
+        _LOGGER.debug("Loaded %s cached instrumentheader responses", len(self._entries))
+
+    def get_quote(self, isin):
+        """Return the last known quote of an ISIN."""
+        entry = self._entries.get(isin)
+        return entry["quote"] if entry else None
+
+    def request_headers(self, isin):
+        """Return the conditional request headers for an ISIN."""
+        entry = self._entries.get(isin)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    @callback
+    def async_set(self, isin, quote, etag=None, last_modified=None):
+        """Store a quote with its validators and schedule a save."""
+        entry = self._entries.get(isin)
+        if entry is not None and etag is None and last_modified is None:
+            # 304 oder Antwort ohne Validatoren: bekannte Validatoren behalten
+            etag, last_modified = entry.get("etag"), entry.get("last_modified")
+        self._entries[isin] = {"etag": etag, "last_modified": last_modified, "quote": quote}
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @callback
+    def async_prune(self, keep):
+        """Drop the entries of ISINs for which keep returns False and schedule a save."""
+        removed = [isin for isin in self._entries if not keep(isin)]
+        for isin in removed:
+            del self._entries[isin]
+        if removed:
+            _LOGGER.debug("Pruned %s cached instrumentheader responses", len(removed))
+            self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self):
+        """Return the data to persist."""
+        return {
+            "entries": {
+                isin: {**entry, "quote": entry["quote"].as_dict()}
+                for isin, entry in self._entries.items()
+            }
+        }
+
+
+async def async_get_response_cache(hass: HomeAssistant) -> ResponseCache:
+    """Return the integration-wide response cache, loading it once on first use."""
+    cache = hass.data.get(DATA_RESPONSE_CACHE)
+    if cache is None:
+        # Gleichzeitige Aufrufer (z. B. die parallelen Prüfungen des Imports) teilen sich das Laden
+        cache = hass.data[DATA_RESPONSE_CACHE] = ResponseCache(hass)
+        cache.load_task = hass.async_create_task(cache.async_load())
+    await cache.load_task
+    return cache
@@ -0,0 +1,64 @@
+"""Request scheduler for outbound calls to the ING API."""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from homeassistant.core import HomeAssistant, callback
+from .const import (
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_REQUESTS_PER_SECOND,
+    DATA_CONFIG,
+    DATA_SCHEDULER,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_REQUESTS_PER_SECOND,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RequestScheduler:
+    """Cap in-flight requests and apply a token-bucket rate limit."""
+
+    def __init__(self, max_concurrent, requests_per_second):
+        """Initialize the scheduler."""
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._rate = float(requests_per_second)
+        self._capacity = max(1.0, self._rate)  # Burst von höchstens einer Sekunde
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def _async_acquire_token(self):
+        """Wait until the bucket holds a token and take it."""
+        # Das Lock sorgt dafür, dass Wartende in Reihenfolge bedient werden
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    @asynccontextmanager
+    async def async_slot(self):
+        """Reserve a request slot for the duration of the context."""
+        await self._async_acquire_token()
+        async with self._semaphore:
+            yield
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> RequestScheduler:
+    """Return the integration-wide request scheduler."""
+    scheduler = hass.data.get(DATA_SCHEDULER)
+    if scheduler is None:
+        conf = hass.data.get(DATA_CONFIG, {})
+        scheduler = RequestScheduler(
+            conf.get(CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS),
+            conf.get(CONF_REQUESTS_PER_SECOND, DEFAULT_REQUESTS_PER_SECOND),
+        )
+        hass.data[DATA_SCHEDULER] = scheduler
+        _LOGGER.debug("Created request scheduler with config: %s", conf)
+    return scheduler
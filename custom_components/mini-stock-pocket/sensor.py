@@ -1,52 +1,121 @@
 """ISIN Sensor Integration."""
-import aiohttp
-import asyncio
 import logging
-from datetime import timedelta  # Import für SCAN_INTERVAL
 from homeassistant.components.sensor import SensorEntity
-from homeassistant.helpers.entity import Entity
-from .const import DOMAIN
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN, EntityCategory
+from homeassistant.core import callback
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+from .api import async_get_client
+from .const import (
+    CONF_CHANGE_DETECTION,
+    CONF_DEADBAND_ABSOLUTE,
+    CONF_DEADBAND_PERCENT,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_HEARTBEAT,
+    DEFAULT_HEARTBEAT,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
-SCAN_INTERVAL = timedelta(minutes=5)  # Setze das Abfrageintervall auf 5 Minuten
+# Summen-Sensoren je Hub: Schlüssel -> Anzeigename
+PORTFOLIO_SENSORS = {
+    "total_value": "Total Value",
+    "change_absolute": "Daily Change",
+    "change_percent": "Daily Change Percent",
+    "positions": "Positions",
+}
+
+# Optionale Diagnose-Sensoren je Hub: Schlüssel -> (Anzeigename, Einheit)
+DIAGNOSTIC_SENSORS = {
+    "refresh_duration": ("Refresh Duration", "s"),
+    "api_requests": ("API Requests", None),
+    "api_failures": ("API Errors", None),
+    "cache_hit_ratio": ("Cache Hit Ratio", "%"),
+}
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up ISIN Sensor from a config entry."""
     hub_name = config_entry.data["hub_name"]
     sensors = config_entry.data.get("sensors", [])
+    hub = hass.data[DOMAIN][hub_name]
+
+    @callback
+    def async_add_sensors(sensors):
+        """Create and add entities for the given sensor configurations."""
+        entities = []
+        for sensor in sensors:
+            if "isin" not in sensor or "name" not in sensor:
+                _LOGGER.error("Invalid sensor configuration: %s", sensor)
+                continue
+            _LOGGER.debug("Registering sensor: %s with ISIN: %s for hub: %s", sensor["name"], sensor["isin"], hub_name)
+            entity = ISINSensor(hub.coordinator, sensor["isin"], sensor["name"], hub_name, sensor.get("quantity", 0))
+            entity.async_update_config(sensor, write=False)
+            hub.entities[sensor["isin"].upper()] = entity
+            entities.append(entity)
+
+        if entities:
+            async_add_entities(entities)
+        else:
+            _LOGGER.warning("No valid sensors to add for hub: %s", hub_name)
+
+    # Die Plattform bleibt für später hinzugefügte Positionen registriert
+    hub.async_add_sensors = async_add_sensors
+
+    # Summen-Sensoren des Depots
+    hub.portfolio_entities = [ISINPortfolioSensor(hub, key) for key in PORTFOLIO_SENSORS]
+    async_add_entities(hub.portfolio_entities)
+
+    if hub.settings.get(CONF_DIAGNOSTIC_SENSORS):
+        async_add_entities([ISINDiagnosticSensor(hub, key) for key in DIAGNOSTIC_SENSORS])
 
     if not sensors:
         _LOGGER.warning("No sensors found for hub: %s", hub_name)
         return
 
     _LOGGER.debug("Setting up sensors for hub: %s with sensors: %s", hub_name, sensors)
+    async_add_sensors(sensors)
 
-    entities = []
-    for sensor in sensors:
-        if "isin" not in sensor or "name" not in sensor:
-            _LOGGER.error("Invalid sensor configuration: %s", sensor)
-            continue
-        _LOGGER.debug("Registering sensor: %s with ISIN: %s for hub: %s", sensor["name"], sensor["isin"], hub_name)
-        entities.append(ISINSensor(sensor["isin"], sensor["name"], hub_name, sensor.get("quantity", 0)))
-
-    if entities:
-        async_add_entities(entities, update_before_add=True)
-    else:
-        _LOGGER.warning("No valid sensors to add for hub: %s", hub_name)
-
-class ISINSensor(SensorEntity):
+class ISINSensor(CoordinatorEntity, RestoreEntity, SensorEntity):
     """Representation of an ISIN Sensor."""
 
-    def __init__(self, isin, name, hub_name, quantity):
+    # Stammdaten ändern sich praktisch nie und werden nicht im Recorder gespeichert
+    _unrecorded_attributes = frozenset({
+        "name",
+        "wkn",
+        "isin",
+        "internalIsin",
+        "instrumentTypeDisplayName",
+        "currencySign",
+        "stockMarket",
+        "suppressed_writes",
+        # Aus dem Kursverlauf im Speicher abgeleitet
+        "intraday_low",
+        "intraday_high",
+        "intraday_sma",
+        "intraday_volatility",
+        "intraday_drawdown",
+    })
+
+    def __init__(self, coordinator, isin, name, hub_name, quantity):
         """Initialize the sensor."""
+        super().__init__(coordinator)
         self._isin = isin
         self._name = name
         self._hub_name = hub_name
         self._quantity = quantity
         self._state = None
-        self._attributes = {}
+        self._quote = None  # Gemeinsamer Quote-Datensatz des Koordinators
+        self._restored_attributes = {}
         self._total_value = None  # Neuer Zustand für price * quantity
+        self._deadband_absolute = None  # None: Einstellung des Hubs verwenden
+        self._deadband_percent = None
+        self._written_state = None  # Zuletzt geschriebener Kurs
+        self._last_write = None
+        self.suppressed_writes = 0
+        self._stale = False
+        self._written_stale = False
 
     #async def async_added_to_hass(self):
     #    """Create a helper for the quantity."""
@@ -65,7 +134,7 @@ class ISINSensor(SensorEntity):
     @property
     def unique_id(self):
         """Return the unique ID of the sensor."""
-        return self._isin.upper()  # ISIN immer in Großbuchstaben
+        return self.coordinator.hub.unique_id(self._isin)
 
     @property
     def state(self):
@@ -75,163 +144,232 @@ class ISINSensor(SensorEntity):
     @property
     def unit_of_measurement(self):
         """Return the unit of measurement."""
-        return self._attributes.get("currency")
+        if self._quote is not None:
+            return self._quote.get("currency")
+        return self._restored_attributes.get("currency")
 
     @property
     def extra_state_attributes(self):
         """Return the sensor attributes."""
-        attributes = self._attributes.copy()
+        # Die Attribute werden erst beim Schreiben des Zustands aufgebaut
+        attributes = self._quote.attributes() if self._quote is not None else dict(self._restored_attributes)
         attributes["quantity"] = round(self._quantity, 2)  # Rundung auf 2 Nachkommastellen
         attributes["total_value"] = self._total_value  # Füge den berechneten Wert hinzu
+        if self.suppressed_writes:
+            attributes["suppressed_writes"] = self.suppressed_writes
+        if self._stale:
+            attributes["stale"] = True  # Letzter bekannter Kurs, Abfrage fehlgeschlagen oder pausiert
+        history = self.coordinator.history.get(self._isin.upper())
+        if history is not None:
+            statistics = history.statistics(dt_util.start_of_local_day().timestamp())
+            if statistics["samples"]:
+                for key in ("low", "high", "sma", "volatility", "drawdown"):
+                    value = statistics[key]
+                    attributes[f"intraday_{key}"] = None if value is None else round(value, 4)
         return attributes
 
-    @property
-    def should_poll(self):
-        """Return True to enable polling."""
-        return True
-
-    async def async_update(self):
-        """Fetch data from the API asynchronously."""
-        url_instrumentheader = f"https://component-api.wertpapiere.ing.de/api/v1/components/instrumentheader/{self._isin}"
-        url_priceinformation = f"https://component-api.wertpapiere.ing.de/api/v1/components/priceinformation/{self._isin}"
+    async def async_added_to_hass(self):
+        """Read the cached quote or restore the last state once the entity has been added."""
+        await super().async_added_to_hass()
+        if self._isin.upper() in (self.coordinator.data or {}):
+            self._update_from_coordinator()
+            return
+
+        # Letzten bekannten Kurs wiederherstellen, bis der Koordinator aktualisiert hat
+        last_state = await self.async_get_last_state()
+        if last_state is None or last_state.state in (STATE_UNKNOWN, STATE_UNAVAILABLE):
+            return
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url_instrumentheader, timeout=10) as response:
-                    if response.status != 200:
-                        _LOGGER.warning("Non-200 response for ISIN %s: %s", self._isin, response.status)
-                        return
-
-                    data = await response.json()
-                    if not data or "price" not in data:
-                        _LOGGER.warning("Invalid or empty response for ISIN %s", self._isin)
-                        return
-
-                    # Update state and attributes
-                    self._state = data.get('price')
-                    self._total_value = self._state * self._quantity if self._state is not None else None
-
-                    # Dynamische Attributerstellung basierend auf instrumentTypeDisplayName
-                    instrument_type = data.get("instrumentType", {}).get("mainType")
-                    _LOGGER.debug("Instrument type for ISIN %s: %s", self._isin, instrument_type)
-
-                    if instrument_type == "Share": # Aktie
-                        self._attributes = {
-                            "name": data.get("name"),
-                            "instrumentTypeDisplayName": data.get("instrumentTypeDisplayName"),
-                            "close": data.get("close"),
-                            "changePercent": data.get("changePercent"),
-                            "changeAbsolute": data.get("changeAbsolute"),
-                            "bid": data.get("bid"),
-                            "bidDate": data.get("bidDate"),
-                            "ask": data.get("ask"),
-                            "askDate": data.get("askDate"),
-                            "wkn": data.get("wkn"),
-                            "isin": data.get("isin"),
-                            "internalIsin": data.get("internalIsin"),
-                            "stockMarket": data.get("stockMarket"),
-                            "priceChangeDate": data.get("priceChangeDate"),
-                            "currency": data.get("currency"),
-                            "currencySign": data.get("currencySign"),
-                            "quantity": self._quantity,
-                        }
-                    elif instrument_type == "Fund": # Fonds & ETF
-                        self._attributes = {
-                            "name": data.get("name"),
-                            "instrumentTypeDisplayName": data.get("instrumentTypeDisplayName"),
-                            "close": data.get("close"),
-                            "changePercent": data.get("changePercent"),
-                            "changeAbsolute": data.get("changeAbsolute"),
-                            "wkn": data.get("wkn"),
-                            "isin": data.get("isin"),
-                            "internalIsin": data.get("internalIsin"),
-                            "stockMarket": data.get("stockMarket"),
-                            "priceChangeDate": data.get("priceChangeDate"),
-                            "currency": data.get("currency"),
-                            "currencySign": data.get("currencySign"),
-                            "quantity": self._quantity,
-                        }
-
-                    elif instrument_type == "Bond": # Anleihe
-                        self._attributes = {
-                            "name": data.get("name"),
-                            "instrumentTypeDisplayName": data.get("instrumentTypeDisplayName"),
-                            "bid": data.get("bid"),
-                            "bidDate": data.get("bidDate"),
-                            "ask": data.get("ask"),
-                            "askDate": data.get("askDate"),
-                            "wkn": data.get("wkn"),
-                            "isin": data.get("isin"),
-                            "internalIsin": data.get("internalIsin"),
-                            "stockMarket": data.get("stockMarket"),
-                            "priceChangeDate": data.get("priceChangeDate"),
-                            "currency": data.get("currency"),
-                            "currencySign": data.get("currencySign"),
-                            "quantity": self._quantity,
-                        }
-
-                    elif instrument_type == "ExchangeRate": # Krypto
-                        self._attributes = {
-                            "name": data.get("name"),
-                            "instrumentTypeDisplayName": data.get("instrumentTypeDisplayName"),
-                            "bidDate": data.get("bidDate"),
-                            "askDate": data.get("askDate"),
-                            "wkn": data.get("wkn"),
-                            "isin": data.get("isin"),
-                            "internalIsin": data.get("internalIsin"),
-                            "stockMarket": data.get("stockMarket"),
-                            "priceChangeDate": data.get("priceChangeDate"),
-                            "currency": data.get("currencySign"),
-                            "currencySign": data.get("currencySign"),
-                            "quantity": self._quantity,
-                        }
-
-                    else:  # Standardfall oder unbekannter Typ
-                        self._attributes = {
-                            "name": data.get("name"),
-                            "currency": data.get("currency"),
-                            "priceChangeDate": data.get("priceChangeDate"),
-                            "wkn": data.get("wkn"),
-                            "isin": data.get("isin"),
-                            "internalIsin": data.get("internalIsin"),
-                            "stockMarket": data.get("stockMarket"),
-                            "currency": data.get("currency"),
-                            "currencySign": data.get("currencySign"), 
-                            "quantity": self._quantity,
-                        }
-                    
-                    _LOGGER.debug("Updated sensor %s with data: %s", self._isin, data)
-
-                # Zweite API-Abfrage: priceinformation
-                if instrument_type in ["Share", "Bond"]:
-                    async with session.get(url_priceinformation, timeout=10) as response:
-                        if response.status != 200:
-                            _LOGGER.warning("Non-200 response for price information ISIN %s: %s", self._isin, response.status)
-                            return
-
-                        price_data = await response.json()
-                        if not price_data or "data" not in price_data:
-                            _LOGGER.warning("Invalid or empty price information for ISIN %s", self._isin)
-                            return
-
-                        # Zusätzliche Informationen aus der zweiten API-Antwort extrahieren
-                        daily_low = next((item["fieldValue"]["value"] for item in price_data.get("data", []) if item["id"] == "DailyLow"), None)
-                        daily_high = next((item["fieldValue"]["value"] for item in price_data.get("data", []) if item["id"] == "DailyHigh"), None)
-                        fifty_two_week_low = next((item["fieldValue"]["value"] for item in price_data.get("data", []) if item["id"] == "FiftyTwoWeekLow"), None)
-                        fifty_two_week_high = next((item["fieldValue"]["value"] for item in price_data.get("data", []) if item["id"] == "FiftyTwoWeekHigh"), None)
-
-                        # Zusätzliche Attribute hinzufügen Aktie & Anleihe
-                        self._attributes.update({
-                            "dailyLow": daily_low,
-                            "dailyHigh": daily_high,
-                            "fiftyTwoWeekLow": fifty_two_week_low,
-                            "fiftyTwoWeekHigh": fifty_two_week_high,
-                        })
-
-                        _LOGGER.debug("Updated sensor %s with price information: %s", self._isin, price_data)
-
-        except aiohttp.ClientError as e:
-            _LOGGER.error("Error fetching data for ISIN %s: %s", self._isin, e)
-        except asyncio.TimeoutError:
-            _LOGGER.error("Timeout fetching data for ISIN %s", self._isin)
-        except Exception as e:
-            _LOGGER.exception("Unexpected error fetching data for ISIN %s: %s", self._isin, e)
\ No newline at end of file
+            self._state = float(last_state.state)
+        except ValueError:
+            return
+        self._restored_attributes = {
+            key: value
+            for key, value in last_state.attributes.items()
+            if key not in ("quantity", "total_value", "unit_of_measurement", "friendly_name")
+        }
+        self._total_value = self._state * self._quantity
+
+    @callback
+    def async_update_config(self, sensor, write=True):
+        """Apply a changed sensor configuration and recompute the total value locally."""
+        self._quantity = sensor.get("quantity", 0)
+        self._deadband_absolute = sensor.get(CONF_DEADBAND_ABSOLUTE)
+        self._deadband_percent = sensor.get(CONF_DEADBAND_PERCENT)
+        self._total_value = self._state * self._quantity if self._state is not None else None
+        if write:
+            self._async_write_state()
+
+    @callback
+    def _async_write_state(self):
+        """Write the state and remember the written price for change detection."""
+        self.async_write_ha_state()
+        self._written_state = self._state
+        self._written_stale = self._stale
+        self._last_write = dt_util.utcnow()
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Handle updated data from the coordinator."""
+        quote, stale = self._quote, self._stale
+        self._update_from_coordinator()
+        if self._quote is quote and self._stale == stale:
+            return  # Kein neuer Kurs für diese ISIN, z. B. ein Zyklus anderer Intervalle
+        if self._should_write():
+            self._async_write_state()
+        else:
+            self.suppressed_writes += 1
+
+    def _should_write(self):
+        """Check whether the new quote is worth a state write."""
+        settings = self.coordinator.hub.settings
+        if not settings.get(CONF_CHANGE_DETECTION) or self._last_write is None:
+            return True
+        if self._stale != self._written_stale:
+            return True
+        if self._state is None or self._written_state is None:
+            return self._state != self._written_state
+
+        # Heartbeat: spätestens nach Ablauf des Intervalls wieder schreiben
+        heartbeat = settings.get(CONF_HEARTBEAT, DEFAULT_HEARTBEAT)
+        if (dt_util.utcnow() - self._last_write).total_seconds() >= heartbeat * 60:
+            return True
+
+        # Totband: nur Kursbewegungen über der Schwelle schreiben
+        deadband_absolute = self._deadband_absolute
+        if deadband_absolute is None:
+            deadband_absolute = settings.get(CONF_DEADBAND_ABSOLUTE, 0.0)
+        deadband_percent = self._deadband_percent
+        if deadband_percent is None:
+            deadband_percent = settings.get(CONF_DEADBAND_PERCENT, 0.0)
+        change = abs(self._state - self._written_state)
+        if change == 0 or change <= deadband_absolute:
+            return False
+        return not self._written_state or change / abs(self._written_state) * 100 > deadband_percent
+
+    def _update_from_coordinator(self):
+        """Update state and attributes from the coordinator's cached data."""
+        isin = self._isin.upper()
+        self._stale = isin in self.coordinator.stale
+        quote = (self.coordinator.data or {}).get(isin)
+        if quote is None:
+            return
+
+        self._quote = quote
+        self._state = quote.price
+        self._total_value = self._state * self._quantity if self._state is not None else None
+
+
+class ISINPortfolioSensor(CoordinatorEntity, SensorEntity):
+    """Aggregate sensor over all positions of a hub."""
+
+    def __init__(self, hub, key):
+        """Initialize the sensor."""
+        super().__init__(hub.coordinator)
+        self._hub = hub
+        self._key = key
+        self._state = None
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._hub.hub_name} - {PORTFOLIO_SENSORS[self._key]}"
+
+    @property
+    def unique_id(self):
+        """Return the unique ID of the sensor."""
+        return f"{self._hub.hub_name}_{self._key}"
+
+    @property
+    def state(self):
+        """Return the aggregated value."""
+        return self._state
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement."""
+        if self._key == "change_percent":
+            return "%"
+        if self._key == "positions":
+            return None
+        return self._hub.totals.currency
+
+    async def async_added_to_hass(self):
+        """Compute the aggregate once the entity has been added."""
+        await super().async_added_to_hass()
+        self._update_from_hub()
+
+    @callback
+    def async_update_from_hub(self):
+        """Recompute the aggregate after a local change of the hub."""
+        self._update_from_hub()
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Handle updated data from the coordinator."""
+        self.async_update_from_hub()
+
+    def _update_from_hub(self):
+        """Update the totals from the coordinator's cached data, without API calls."""
+        totals = self._hub.totals
+        totals.update(self._hub.sensors, self.coordinator.data or {})
+        value = getattr(totals, self._key)
+        self._state = round(value, 2) if isinstance(value, float) else value
+
+
+class ISINDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor for the refresh cycle and API metrics of a hub."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, hub, key):
+        """Initialize the sensor."""
+        super().__init__(hub.coordinator)
+        self._hub = hub
+        self._key = key
+        self._metrics = async_get_client(hub.hass).metrics
+        self._state = None
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{self._hub.hub_name} - {DIAGNOSTIC_SENSORS[self._key][0]}"
+
+    @property
+    def unique_id(self):
+        """Return the unique ID of the sensor."""
+        return f"{self._hub.hub_name}_{self._key}"
+
+    @property
+    def state(self):
+        """Return the current metric value."""
+        return self._state
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement."""
+        return DIAGNOSTIC_SENSORS[self._key][1]
+
+    async def async_added_to_hass(self):
+        """Read the metric once the entity has been added."""
+        await super().async_added_to_hass()
+        self._update_from_metrics()
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Handle updated data from the coordinator."""
+        self._update_from_metrics()
+        self.async_write_ha_state()
+
+    def _update_from_metrics(self):
+        """Read the metric, the counters are only aggregated here."""
+        if self._key == "refresh_duration":
+            duration = self.coordinator.last_cycle_duration
+            self._state = round(duration, 3) if duration is not None else None
+        elif self._key == "api_requests":
+            self._state = self._metrics.requests
+        elif self._key == "api_failures":
+            self._state = self._metrics.failures
+        elif self._key == "cache_hit_ratio":
+            self._state = self._metrics.hit_ratio()
@@ -0,0 +1,94 @@
+"""Services of the ISIN Sensor integration."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+from .const import CONF_FRESHNESS_WINDOW, DATA_CONFIG, DEFAULT_FRESHNESS_WINDOW, DOMAIN
+
+SERVICE_GET_PRICE_HISTORY = "get_price_history"
+SERVICE_REFRESH = "refresh"
+
+GET_PRICE_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required("isin"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("hub_name"): cv.string,
+    }
+)
+
+REFRESH_SCHEMA = vol.Schema(
+    {
+        vol.Optional("hub_name"): cv.string,
+        vol.Optional("isin"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("max_age"): cv.positive_int,  # Sekunden, überschreibt freshness_window
+    }
+)
+
+
+def _history_response(history):
+    """Return the samples and statistics of a price history."""
+    times, prices = history.samples()
+    return {
+        "samples": [
+            {"time": datetime.fromtimestamp(timestamp, timezone.utc).isoformat(), "price": price}
+            for timestamp, price in zip(times, prices)
+        ],
+        "statistics": history.statistics(),
+        "intraday": history.statistics(dt_util.start_of_local_day().timestamp()),
+    }
+
+
+@callback
+def async_setup_services(hass: HomeAssistant):
+    """Register the services of the integration."""
+
+    async def async_get_price_history(call: ServiceCall):
+        """Return the in-memory price history of the requested ISINs."""
+        hubs = hass.data.get(DOMAIN, {})
+        hub_name = call.data.get("hub_name")
+        if hub_name is not None and hub_name not in hubs:
+            raise ServiceValidationError(f"Unknown hub: {hub_name}")
+
+        response = {}
+        for isin in call.data["isin"]:
+            isin = isin.upper()
+            for name, hub in hubs.items():
+                if hub_name is not None and name != hub_name:
+                    continue
+                history = hub.coordinator.history.get(isin)
+                if history is not None:
+                    response[isin] = _history_response(history)
+                    break
+        return response
+
+    async def async_refresh(call: ServiceCall):
+        """Fetch fresh quotes for a hub, a list of ISINs or all hubs."""
+        hubs = hass.data.get(DOMAIN, {})
+        hub_name = call.data.get("hub_name")
+        if hub_name is not None and hub_name not in hubs:
+            raise ServiceValidationError(f"Unknown hub: {hub_name}")
+        selected = [hubs[hub_name]] if hub_name is not None else list(hubs.values())
+
+        requested = {isin.upper() for isin in call.data.get("isin", [])}
+        max_age = call.data.get(
+            "max_age", hass.data.get(DATA_CONFIG, {}).get(CONF_FRESHNESS_WINDOW, DEFAULT_FRESHNESS_WINDOW)
+        )
+        # Jede ISIN wird höchstens einmal abgefragt, auch wenn mehrere Hubs sie halten
+        refreshes = []
+        for hub in selected:
+            isins = [isin for isin in hub.isins if not requested or isin in requested]
+            if isins:
+                refreshes.append(hub.coordinator.async_refresh_isins(isins, timedelta(seconds=max_age)))
+        await asyncio.gather(*refreshes)
+
+    hass.services.async_register(DOMAIN, SERVICE_REFRESH, async_refresh, schema=REFRESH_SCHEMA)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_PRICE_HISTORY,
+        async_get_price_history,
+        schema=GET_PRICE_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
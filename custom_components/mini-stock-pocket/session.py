@@ -0,0 +1,43 @@
+"""Shared HTTP session for the ISIN Sensor integration."""
+import aiohttp
+import logging
+from homeassistant.core import HomeAssistant, callback
+from .const import (
+    CONF_CONNECTION_LIMIT,
+    CONF_DNS_CACHE_TTL,
+    DATA_CONFIG,
+    DATA_SESSION,
+    DEFAULT_CONNECTION_LIMIT,
+    DEFAULT_DNS_CACHE_TTL,
+    KEEPALIVE_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_get_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the integration-wide session, creating it on first use."""
+    session = hass.data.get(DATA_SESSION)
+    if session is not None and not session.closed:
+        return session
+
+    conf = hass.data.get(DATA_CONFIG, {})
+    connector = aiohttp.TCPConnector(
+        limit=conf.get(CONF_CONNECTION_LIMIT, DEFAULT_CONNECTION_LIMIT),
+        use_dns_cache=True,
+        ttl_dns_cache=conf.get(CONF_DNS_CACHE_TTL, DEFAULT_DNS_CACHE_TTL),
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    session = aiohttp.ClientSession(connector=connector)
+    hass.data[DATA_SESSION] = session
+    _LOGGER.debug("Created shared HTTP session with connector: %s", connector)
+    return session
+
+
+async def async_close_session(hass: HomeAssistant) -> None:
+    """Close the integration-wide session if it exists."""
+    session = hass.data.pop(DATA_SESSION, None)
+    if session is not None and not session.closed:
+        await session.close()
+        _LOGGER.debug("Closed shared HTTP session")
@@ -0,0 +1,35 @@
+"""Fixtures for the ISIN Sensor tests against the local ING API stub."""
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from stub_server import StubApi  # noqa: E402
+
+INTEGRATION = "custom_components.mini-stock-pocket"
+api = importlib.import_module(f"{INTEGRATION}.api")
+session = importlib.import_module(f"{INTEGRATION}.session")
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Allow loading the integration from custom_components."""
+    yield
+
+
+@pytest.fixture
+async def stub_api(hass, monkeypatch, socket_enabled):
+    """Serve the ING API from the local stub and close the shared session afterwards.
+
+    pytest-socket blocks all sockets by default, the stub needs a TCP server on 127.0.0.1.
+    """
+    stub = StubApi()
+    monkeypatch.setattr(api, "API_BASE_URL", await stub.async_start())
+    yield stub
+    await session.async_close_session(hass)
+    await stub.async_stop()
@@ -0,0 +1,42 @@
+"""Tests for the ING API client against the local API stub."""
+import asyncio
+import importlib
+
+from stub_server import make_isin
+
+api = importlib.import_module("custom_components.mini-stock-pocket.api")
+circuit_breaker = importlib.import_module("custom_components.mini-stock-pocket.circuit_breaker")
+quote = importlib.import_module("custom_components.mini-stock-pocket.quote")
+
+
+def test_price_information_with_missing_value():
+    """A priceinformation item without value leaves only that field empty."""
+    price_information = quote.parse_price_information(
+        {"data": [{"id": "DailyLow", "fieldValue": None}, {"id": "DailyHigh", "fieldValue": {"value": 2.0}}]}
+    )
+    assert price_information.daily_low is None
+    assert price_information.daily_high == 2.0
+
+
+def test_unexpected_error_is_not_an_outage():
+    """Only network errors, timeouts, 5xx and 429 count towards the API circuit breaker."""
+    assert api.FetchResult("DE0005140008", error="timeout").is_outage
+    assert api.FetchResult("DE0005140008", status=503, error="HTTP 503").is_outage
+    assert not api.FetchResult("DE0005140008", error="invalid data", unexpected=True).is_outage
+
+
+async def test_cancelled_probe_releases_breaker(hass, stub_api):
+    """A cancelled half-open probe must not block all later requests."""
+    client = await api.async_load_client(hass)
+    client.breaker = circuit_breaker.CircuitBreaker(1, 0.0, 0.0)
+    client.breaker.record_failure()  # Offen, Backoff bereits abgelaufen
+    stub_api.latency = 1.0
+
+    task = hass.async_create_task(client.async_fetch_guarded(make_isin(1)))
+    await asyncio.sleep(0.1)
+    assert client.breaker.blocked()  # Probe läuft
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert not client.breaker.blocked()
+    await hass.async_block_till_done()
@@ -0,0 +1,31 @@
+"""Tests for the value-weighted allocation of the request budget."""
+import importlib
+from datetime import timedelta
+
+budget = importlib.import_module("custom_components.mini-stock-pocket.budget")
+
+MAX_STALENESS = timedelta(minutes=60)
+
+
+def test_slow_interval_is_not_shortened():
+    """A holding with a longer interval than max_staleness keeps it, whatever its weight."""
+    intervals = budget.allocate_intervals(
+        {"FUND": 100000.0, "SHARE": 1.0},
+        {"FUND": timedelta(minutes=1440), "SHARE": timedelta(minutes=5)},
+        600,
+        MAX_STALENESS,
+    )
+    assert intervals["FUND"] == timedelta(minutes=1440)
+    assert intervals["SHARE"] == timedelta(minutes=5)
+
+
+def test_budget_follows_value_within_staleness():
+    """Large positions get shorter intervals, small ones still stay within max_staleness."""
+    weights = {f"SMALL{i}": 50.0 for i in range(10)}
+    weights["LARGE"] = 50000.0
+    shortest = {isin: timedelta(minutes=1) for isin in weights}
+
+    intervals = budget.allocate_intervals(weights, shortest, 60, MAX_STALENESS)
+
+    assert intervals["LARGE"] < intervals["SMALL0"] <= MAX_STALENESS
+    assert sum(timedelta(hours=1) / interval for interval in intervals.values()) <= 60
@@ -0,0 +1,43 @@
+"""Tests for the config flow of the ISIN Sensor integration."""
+import importlib
+
+from homeassistant import config_entries
+from homeassistant.data_entry_flow import FlowResultType
+from stub_server import make_isin
+
+const = importlib.import_module("custom_components.mini-stock-pocket.const")
+
+
+async def test_first_hub_before_setup(hass, stub_api):
+    """Create the first hub while the integration has not been set up yet."""
+    assert const.DATA_RESPONSE_CACHE not in hass.data
+    isin = make_isin(1)
+
+    result = await hass.config_entries.flow.async_init(const.DOMAIN, context={"source": config_entries.SOURCE_USER})
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {"hub_name": "Depot"})
+    assert result["step_id"] == "add_sensor"
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"isin": isin, "name": "Holding", "quantity": 2.0}
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert result["data"]["sensors"] == [{"isin": isin, "name": "Holding", "quantity": 2.0}]
+    # Die Prüfung lädt den Kurs, alle weiteren Abfragen sind bedingt
+    assert stub_api.requests[("instrumentheader", 200)] == 1
+
+    await hass.config_entries.async_unload(result["result"].entry_id)
+
+
+async def test_invalid_isin_before_setup(hass, stub_api):
+    """Reject an ISIN with a wrong check digit without a request."""
+    result = await hass.config_entries.flow.async_init(const.DOMAIN, context={"source": config_entries.SOURCE_USER})
+    result = await hass.config_entries.flow.async_configure(result["flow_id"], {"hub_name": "Depot"})
+    isin = make_isin(1)
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"isin": isin[:-1] + str((int(isin[-1]) + 1) % 10), "name": "Holding"}
+    )
+
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"isin": "invalid_isin"}
+    assert stub_api.request_count == 0
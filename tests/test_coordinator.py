@@ -0,0 +1,41 @@
+"""Tests for the refresh schedule of the ISIN Sensor coordinator."""
+import importlib
+
+from homeassistant.util import dt as dt_util
+from stub_server import make_isin
+
+api = importlib.import_module("custom_components.mini-stock-pocket.api")
+const = importlib.import_module("custom_components.mini-stock-pocket.const")
+integration = importlib.import_module("custom_components.mini-stock-pocket")
+
+
+async def _async_cycle(freezer, coordinator, when):
+    """Run a refresh cycle of a hub at the given time and return when it wakes next."""
+    freezer.move_to(when)
+    await coordinator.async_refresh()
+    return when + coordinator.update_interval
+
+
+async def test_hubs_stay_staggered(hass, stub_api, freezer):
+    """Hubs keep their phase offset after the first cycles instead of collapsing onto one phase."""
+    freezer.move_to("2026-01-05 10:00:00+00:00")
+    await api.async_load_client(hass)
+    hubs = [
+        integration.ISINHub(hass, hub_name, [{"isin": make_isin(index), "name": hub_name, "quantity": 1.0}])
+        for index, hub_name in enumerate(("Depot A", "Depot B"), start=1)
+    ]
+    start = dt_util.utcnow()
+    wakeups = {hub.hub_name: start for hub in hubs}
+
+    for _ in range(3):
+        # Zyklen in zeitlicher Reihenfolge ausführen, wie sie der Zeitplan auslösen würde
+        for hub in sorted(hubs, key=lambda hub: wakeups[hub.hub_name]):
+            wakeups[hub.hub_name] = await _async_cycle(freezer, hub.coordinator, wakeups[hub.hub_name])
+
+    assert all(hub.coordinator.last_update_success for hub in hubs)
+    period = const.SCAN_INTERVAL.total_seconds()
+    offset = (wakeups["Depot B"] - wakeups["Depot A"]).total_seconds() % period
+    assert const.BUCKET_TOLERANCE.total_seconds() < offset < period - const.BUCKET_TOLERANCE.total_seconds()
+    # Jeder Hub fragt im festen Takt ab
+    assert all(hub.coordinator.update_interval == const.SCAN_INTERVAL for hub in hubs)
+    await hass.async_block_till_done()
@@ -0,0 +1,63 @@
+"""Tests for the conditional instrumentheader requests and the persistent response cache."""
+import importlib
+from datetime import timedelta
+from unittest.mock import patch
+
+import aiohttp
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from stub_server import make_isin
+
+api = importlib.import_module("custom_components.mini-stock-pocket.api")
+const = importlib.import_module("custom_components.mini-stock-pocket.const")
+response_cache = importlib.import_module("custom_components.mini-stock-pocket.response_cache")
+
+
+async def test_not_modified_reuses_quote(hass, stub_api):
+    """A second fetch sends If-None-Match and reuses the cached quote on 304."""
+    client = await api.async_load_client(hass)
+    isin = make_isin(1)
+
+    first = await client.async_fetch_header(isin)
+    assert first.status == 200
+    assert "If-None-Match" not in stub_api.last_headers["instrumentheader"]
+
+    with patch.object(aiohttp.ClientResponse, "json", side_effect=AssertionError("JSON decoded")):
+        second = await client.async_fetch_header(isin)
+
+    assert stub_api.last_headers["instrumentheader"]["If-None-Match"] == '"0"'
+    assert second.status == 304
+    assert second.not_modified
+    assert second.quote is first.quote
+
+
+async def test_validators_survive_restart(hass, stub_api, hass_storage):
+    """The ETag and quote are saved and loaded again by a new cache."""
+    client = await api.async_load_client(hass)
+    isin = make_isin(1)
+    first = await client.async_fetch_header(isin)
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=const.STORAGE_SAVE_DELAY + 1))
+    await hass.async_block_till_done()
+    assert isin in hass_storage[const.STORAGE_KEY]["data"]["entries"]
+
+    cache = response_cache.ResponseCache(hass)
+    await cache.async_load()
+    assert cache.request_headers(isin) == {"If-None-Match": '"0"'}
+    assert cache.get_quote(isin).as_dict() == first.quote.as_dict()
+
+
+async def test_prune_keeps_holdings_and_recent_validations(hass, stub_api):
+    """Responses of ISINs that are neither held nor recently validated are dropped."""
+    client = await api.async_load_client(hass)
+    held, validated, released = make_isin(1), make_isin(2), make_isin(3)
+    await client.async_fetch_header(held)
+    await client.async_fetch_header(released)
+    assert await client.async_validate_isin(validated)
+
+    client.async_prune({held})
+
+    cache = hass.data[const.DATA_RESPONSE_CACHE]
+    assert cache.get_quote(held) is not None
+    assert cache.get_quote(validated) is not None
+    assert cache.get_quote(released) is None